@@ -68,8 +68,8 @@ if 'code' in query_params:
 # Timer state
 if 'timer_running' not in st.session_state:
     st.session_state.timer_running = False
-if 'timer_start_time' not in st.session_state:
-    st.session_state.timer_start_time = None
+if 'timer_start_mono' not in st.session_state:
+    st.session_state.timer_start_mono = None
 if 'timer_duration' not in st.session_state:
     st.session_state.timer_duration = 25
 if 'timer_subject_id' not in st.session_state:
@@ -94,6 +94,8 @@ if 'chat_history' not in st.session_state:
 # Knowledge Gap Assessment state
 if 'current_assessment' not in st.session_state:
     st.session_state.current_assessment = None
+if 'assessment_questions' not in st.session_state:
+    st.session_state.assessment_questions = None
 if 'assessment_index' not in st.session_state:
     st.session_state.assessment_index = 0
 if 'assessment_start_time' not in st.session_state:
@@ -28,6 +28,21 @@ def ensure_backup_dir():
     BACKUPS_PATH.mkdir(parents=True, exist_ok=True)
 
 
+def _copy_database(src_path: Path, dst_path: Path):
+    """Copy a SQLite database using SQLite's online backup API.
+
+    The live database runs in WAL mode, so a plain file copy could miss
+    committed pages that are still in study.db-wal.
+    """
+    src = sqlite3.connect(str(src_path))
+    dst = sqlite3.connect(str(dst_path))
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
 def get_backup_metadata() -> Dict:
     """Generate metadata for a backup."""
     import database as db
@@ -68,6 +83,7 @@ def create_backup(backup_name: Optional[str] = None) -> Tuple[bool, str, Optiona
         filename = f"backup_{timestamp}.zip"
 
     backup_path = BACKUPS_PATH / filename
+    db_snapshot = BACKUPS_PATH / f"{filename}.db.tmp"
 
     try:
         # Check if database exists
@@ -80,8 +96,9 @@ def create_backup(backup_name: Optional[str] = None) -> Tuple[bool, str, Optiona
             metadata = get_backup_metadata()
             zf.writestr('metadata.json', json.dumps(metadata, indent=2))
 
-            # Add database
-            zf.write(DB_PATH, 'study.db')
+            # Add database (snapshot first so WAL contents are included)
+            _copy_database(DB_PATH, db_snapshot)
+            zf.write(db_snapshot, 'study.db')
 
             # Add images
             if IMAGES_PATH.exists():
@@ -105,6 +122,10 @@ def create_backup(backup_name: Optional[str] = None) -> Tuple[bool, str, Optiona
             backup_path.unlink()
         return False, f"Backup failed: {str(e)}", None
 
+    finally:
+        if db_snapshot.exists():
+            db_snapshot.unlink()
+
 
 def verify_backup_integrity(backup_path: str) -> Tuple[bool, str]:
     """
@@ -254,10 +275,9 @@ def restore_backup(backup_path: str, create_safety_backup: bool = True) -> Tuple
             if integrity_result != 'ok':
                 raise Exception(f"Database integrity check failed: {integrity_result}")
 
-            # Replace current database
-            if DB_PATH.exists():
-                DB_PATH.unlink()
-            shutil.copy2(extracted_db, DB_PATH)
+            # Replace current database in place (works with the WAL file
+            # and any connections the app still has open)
+            _copy_database(extracted_db, DB_PATH)
 
             # Replace images
             extracted_images = temp_dir / 'images' / 'notes'
@@ -5,20 +5,96 @@ Includes the SM-2 spaced repetition algorithm for optimal flashcard scheduling.
 """
 
 import sqlite3
+import threading
 from datetime import datetime, date, timedelta
 from pathlib import Path
 
 # Database file location (same folder as this script)
 DATABASE_PATH = Path(__file__).parent / "study.db"
 
+# Long-lived connection used only to watch for writes (see data_version)
+_version_conn = None
+_version_lock = threading.Lock()
+
+# journal_mode=WAL is stored in the database file, so it only needs setting once
+_wal_enabled = False
+
+# Set by init_database() once the notes_fts full-text index is available
+_notes_fts_enabled = False
+
+# Idle connections handed back by close(); reused by get_connection()
+POOL_SIZE = 4
+STATEMENT_CACHE_SIZE = 256
+MMAP_SIZE = 128 * 1024 * 1024
+_pool = []
+_pool_lock = threading.Lock()
+
+
+class _PooledConnection(sqlite3.Connection):
+    """SQLite connection whose close() returns it to the pool.
+
+    Every database function follows connect -> query -> close, so pooling
+    behind close() lets them all reuse open connections unchanged.
+    """
+
+    def close(self):
+        if self._in_pool:
+            return
+        if self.in_transaction:
+            self.rollback()  # Discard anything the caller didn't commit
+        with _pool_lock:
+            if len(_pool) < POOL_SIZE:
+                self._in_pool = True
+                _pool.append(self)
+                return
+        super().close()
+
 
 def get_connection():
-    """Create a connection to the SQLite database."""
-    conn = sqlite3.connect(DATABASE_PATH)
+    """Get a connection to the SQLite database, reusing a pooled one if idle.
+
+    WAL mode lets pages keep reading while a flashcard review or focus session
+    is written, and synchronous=NORMAL skips the fsync on every commit
+    (still safe against corruption in WAL mode). Reads are memory-mapped, and
+    each pooled connection keeps its own cache of prepared statements.
+    """
+    global _wal_enabled
+    with _pool_lock:
+        conn = _pool.pop() if _pool else None
+    if conn is not None:
+        conn._in_pool = False
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # check_same_thread=False: a pooled connection may be picked up by another
+    # Streamlit session thread, but only ever by one thread at a time
+    conn = sqlite3.connect(DATABASE_PATH, factory=_PooledConnection, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    conn._in_pool = False
     conn.row_factory = sqlite3.Row  # Allows accessing columns by name
+    if not _wal_enabled:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_enabled = True
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
     return conn
 
 
+def data_version() -> int:
+    """Return a number that changes whenever the database has been written to.
+
+    PRAGMA data_version only changes when *another* connection commits, so a
+    dedicated connection is kept open for it. Cheap enough to call on every
+    rerun, which makes it a good cache key for st.cache_data.
+    """
+    global _version_conn
+    with _version_lock:
+        if _version_conn is None:
+            _version_conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+        return _version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+
 def row_to_dict(row):
     """Convert a sqlite3.Row to a dictionary (needed for Streamlit compatibility)."""
     if row is None:
@@ -69,6 +145,12 @@ def init_database():
     except sqlite3.OperationalError:
         pass  # Column already exists
 
+    # Index for the homework list filters (subject/priority within pending or completed)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_homework_filters
+        ON homework(completed, subject_id, priority, due_date)
+    """)
+
     # Exams table - tracks exam dates
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS exams (
@@ -169,6 +251,54 @@ def init_database():
         )
     """)
 
+    # Index for the notes list (subject filter, newest first)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notes_subject_updated
+        ON notes(subject_id, updated_at)
+    """)
+
+    # Full-text index over notes (external content table kept in sync by
+    # triggers). Skipped if this SQLite build has no FTS5; search then uses LIKE.
+    global _notes_fts_enabled
+    try:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'notes_fts'")
+        existing = cursor.fetchone()
+        fts_existed = existing is not None and 'porter' in existing['sql']
+        if existing and not fts_existed:
+            # Created before stemming was added; rebuild with the new tokenizer
+            cursor.execute("DROP TABLE notes_fts")
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts
+            USING fts5(title, topic, content, content='notes', content_rowid='id',
+                       tokenize='porter unicode61')
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+                INSERT INTO notes_fts(rowid, title, topic, content)
+                VALUES (new.id, new.title, new.topic, new.content);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+                INSERT INTO notes_fts(notes_fts, rowid, title, topic, content)
+                VALUES ('delete', old.id, old.title, old.topic, old.content);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, topic, content ON notes BEGIN
+                INSERT INTO notes_fts(notes_fts, rowid, title, topic, content)
+                VALUES ('delete', old.id, old.title, old.topic, old.content);
+                INSERT INTO notes_fts(rowid, title, topic, content)
+                VALUES (new.id, new.title, new.topic, new.content);
+            END
+        """)
+        if not fts_existed:
+            # Index notes written before the FTS table existed
+            cursor.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+        _notes_fts_enabled = True
+    except sqlite3.OperationalError:
+        _notes_fts_enabled = False
+
     # Note images table - stores images from OCR alongside extracted text
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS note_images (
@@ -192,6 +322,18 @@ def init_database():
         ON note_images(extracted_text)
     """)
 
+    # OCR cache - Vision API results keyed by a hash of the image bytes, so
+    # re-uploading the same page doesn't pay for a second API call
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ocr_cache (
+            image_hash TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            words TEXT,
+            confidence REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
     # Past papers table - for tracking practice papers
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS past_papers (
@@ -207,6 +349,7 @@ def init_database():
             notes TEXT,
             raw_content TEXT,
             ai_summary TEXT,
+            key_topics TEXT,
             FOREIGN KEY (subject_id) REFERENCES subjects(id)
         )
     """)
@@ -220,6 +363,19 @@ def init_database():
         cursor.execute("ALTER TABLE past_papers ADD COLUMN ai_summary TEXT")
     except sqlite3.OperationalError:
         pass  # Column already exists
+    try:
+        cursor.execute("ALTER TABLE past_papers ADD COLUMN key_topics TEXT")
+        # Backfill from stored summaries so the papers list never parses JSON
+        cursor.execute("""
+            UPDATE past_papers SET key_topics = (
+                SELECT group_concat(value, ', ') FROM (
+                    SELECT value FROM json_each(ai_summary, '$.key_topics') LIMIT 5
+                )
+            )
+            WHERE json_valid(ai_summary)
+        """)
+    except sqlite3.OperationalError:
+        pass  # Column already exists
 
     # Past paper questions - individual question scores with analysis
     cursor.execute("""
@@ -257,6 +413,25 @@ def init_database():
     except sqlite3.OperationalError:
         pass  # Column already exists
 
+    # Indexes for the past paper analysis queries: per-paper mark sums,
+    # topic/type aggregates and the subject-filtered papers list
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_paper_questions_paper
+        ON paper_questions(paper_id, marks_achieved)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_paper_questions_topic
+        ON paper_questions(topic)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_paper_questions_type
+        ON paper_questions(question_type)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_past_papers_subject
+        ON past_papers(subject_id, completed_at DESC)
+    """)
+
     # Paper analysis reports - cross-paper pattern analysis
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS paper_analysis_reports (
@@ -358,6 +533,45 @@ def init_database():
         )
     """)
 
+    # Indexes for assessment history and per-assessment lookups
+    # (topic_mastery and exam_requirements are covered by their UNIQUE keys)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_assessments_subject_started
+        ON knowledge_assessments(subject_id, started_at)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_assessment_questions_assessment
+        ON assessment_questions(assessment_id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_assessment_responses_assessment
+        ON assessment_responses(assessment_id)
+    """)
+
+    # Question cache - generated assessment questions kept for reuse, so a
+    # subject's topics stop needing API calls once they have a pool
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS question_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            question_text TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(subject, topic, question_text)
+        )
+    """)
+
+    # LLM response cache - generated feedback/analysis keyed by a hash of its
+    # inputs, so revisiting a results page doesn't call the API again
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            expires_at TIMESTAMP NOT NULL
+        )
+    """)
+
     # Study schedules - main schedule storage
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS study_schedules (
@@ -627,6 +841,10 @@ def init_database():
         )
     """)
 
+    # Refresh planner statistics where they are missing or stale, so new
+    # indexes are actually picked; cheap when nothing has changed
+    cursor.execute("PRAGMA optimize=0x10002")
+
     conn.commit()
     conn.close()
 
@@ -734,6 +952,64 @@ def get_all_homework(include_completed: bool = False) -> list:
     return rows_to_dicts(homework)
 
 
+def _homework_filters(subject_id: int = None, priority: str = None,
+                      completed: bool = False) -> tuple:
+    """Build the WHERE clause and params shared by get_homework/get_homework_count."""
+    query = " WHERE 1=1"
+    params = []
+
+    if completed is not None:
+        query += " AND h.completed = ?"
+        params.append(1 if completed else 0)
+    if subject_id:
+        query += " AND h.subject_id = ?"
+        params.append(subject_id)
+    if priority:
+        query += " AND h.priority = ?"
+        params.append(priority)
+
+    return query, params
+
+
+def get_homework(subject_id: int = None, priority: str = None, completed: bool = False,
+                 limit: int = None, offset: int = 0) -> list:
+    """Get pending (or completed) homework with optional filters and paging.
+
+    Pass completed=None to include both pending and completed homework.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    where, params = _homework_filters(subject_id, priority, completed)
+    query = """
+        SELECT h.*, s.name as subject_name, s.colour as subject_colour
+        FROM homework h
+        JOIN subjects s ON h.subject_id = s.id
+    """ + where + " ORDER BY h.due_date ASC, h.priority DESC"
+
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+    cursor.execute(query, params)
+    homework = cursor.fetchall()
+    conn.close()
+    return rows_to_dicts(homework)
+
+
+def get_homework_count(subject_id: int = None, priority: str = None,
+                       completed: bool = False) -> int:
+    """Count homework matching the same filters as get_homework."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    where, params = _homework_filters(subject_id, priority, completed)
+    cursor.execute("SELECT COUNT(*) as count FROM homework h" + where, params)
+    count = cursor.fetchone()['count']
+    conn.close()
+    return count
+
+
 def get_homework_due_today() -> list:
     """Get homework due today."""
     conn = get_connection()
@@ -816,6 +1092,41 @@ def mark_homework_complete(homework_id: int):
         )
 
 
+def mark_homework_complete_bulk(homework_ids: list):
+    """Mark several homework items as completed in one transaction.
+
+    Topic mastery is credited for each newly completed item with a topic,
+    the same as mark_homework_complete().
+    """
+    if not homework_ids:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    placeholders = ",".join("?" * len(homework_ids))
+    cursor.execute(
+        f"SELECT id, subject_id, topic FROM homework WHERE completed = 0 AND id IN ({placeholders})",
+        list(homework_ids)
+    )
+    homework = cursor.fetchall()
+
+    now = datetime.now()
+    cursor.executemany(
+        "UPDATE homework SET completed = 1, completed_at = ? WHERE id = ?",
+        [(now, hw['id']) for hw in homework]
+    )
+    conn.commit()
+    conn.close()
+
+    for hw in homework:
+        if hw['topic']:
+            update_topic_mastery(
+                subject_id=hw['subject_id'],
+                topic=hw['topic'],
+                is_correct=True
+            )
+
+
 def mark_homework_incomplete(homework_id: int):
     """Mark a homework item as not completed."""
     conn = get_connection()
@@ -1196,6 +1507,27 @@ def get_homework_stats() -> dict:
     }
 
 
+def get_data_counts() -> dict:
+    """Row counts for the Settings data tab, in a single query.
+
+    'exams' counts upcoming exams only, matching get_all_exams.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM subjects) as subjects,
+            (SELECT COUNT(*) FROM homework) as homework,
+            (SELECT COUNT(*) FROM notes) as notes,
+            (SELECT COUNT(*) FROM flashcards) as flashcards,
+            (SELECT COUNT(*) FROM past_papers) as past_papers,
+            (SELECT COUNT(*) FROM exams WHERE exam_date >= ?) as exams
+    """, (date.today().isoformat(),))
+    counts = dict(cursor.fetchone())
+    conn.close()
+    return counts
+
+
 # =============================================================================
 # FLASHCARD FUNCTIONS (with SM-2 Spaced Repetition Algorithm)
 # =============================================================================
@@ -1310,6 +1642,49 @@ def get_all_flashcards(subject_id: int = None) -> list:
     return rows_to_dicts(cards)
 
 
+def get_flashcards_page(subject_id: int = None, limit: int = 50, offset: int = 0) -> list:
+    """Get one page of flashcards, optionally filtered by subject."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    if subject_id:
+        cursor.execute("""
+            SELECT f.*, s.name as subject_name, s.colour as subject_colour
+            FROM flashcards f
+            JOIN subjects s ON f.subject_id = s.id
+            WHERE f.subject_id = ?
+            ORDER BY f.next_review ASC
+            LIMIT ? OFFSET ?
+        """, (subject_id, limit, offset))
+    else:
+        cursor.execute("""
+            SELECT f.*, s.name as subject_name, s.colour as subject_colour
+            FROM flashcards f
+            JOIN subjects s ON f.subject_id = s.id
+            ORDER BY f.next_review ASC
+            LIMIT ? OFFSET ?
+        """, (limit, offset))
+
+    cards = cursor.fetchall()
+    conn.close()
+    return rows_to_dicts(cards)
+
+
+def get_flashcards_count(subject_id: int = None) -> int:
+    """Get the total number of flashcards, optionally filtered by subject."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    if subject_id:
+        cursor.execute("SELECT COUNT(*) as count FROM flashcards WHERE subject_id = ?", (subject_id,))
+    else:
+        cursor.execute("SELECT COUNT(*) as count FROM flashcards")
+
+    count = cursor.fetchone()['count']
+    conn.close()
+    return count
+
+
 def get_due_flashcards(subject_id: int = None) -> list:
     """Get all flashcards that are due for review today or earlier."""
     conn = get_connection()
@@ -1474,6 +1849,19 @@ def delete_flashcard(flashcard_id: int):
     conn.close()
 
 
+def delete_flashcards_bulk(flashcard_ids: list):
+    """Delete several flashcards and their review history in one transaction."""
+    if not flashcard_ids:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    params = [(flashcard_id,) for flashcard_id in flashcard_ids]
+    cursor.executemany("DELETE FROM card_reviews WHERE flashcard_id = ?", params)
+    cursor.executemany("DELETE FROM flashcards WHERE id = ?", params)
+    conn.commit()
+    conn.close()
+
+
 def update_flashcard(flashcard_id: int, question: str, answer: str, topic: str = ""):
     """Update a flashcard's question and answer."""
     conn = get_connection()
@@ -2441,14 +2829,85 @@ def toggle_note_favourite(note_id: int):
     conn.close()
 
 
-def get_favourite_notes() -> list:
-    """Get all favourite notes."""
+def _note_filters(subject_id: int = None, search: str = None) -> tuple:
+    """Build the joins, WHERE clause and params shared by get_notes/get_notes_count.
+
+    The last item is True when the search runs through notes_fts, so the
+    query can be ranked with bm25().
+    """
+    joins = ""
+    query = " WHERE 1=1"
+    params = []
+    ranked = False
+
+    if subject_id:
+        query += " AND n.subject_id = ?"
+        params.append(subject_id)
+
+    if search:
+        match = _fts_match_query(search) if _notes_fts_enabled else None
+        if match:
+            joins = " JOIN notes_fts ON notes_fts.rowid = n.id"
+            query += " AND notes_fts MATCH ?"
+            params.append(match)
+            ranked = True
+        else:
+            search_term = f"%{search}%"
+            query += " AND (n.title LIKE ? OR n.topic LIKE ? OR n.content LIKE ?)"
+            params.extend([search_term, search_term, search_term])
+
+    return joins, query, params, ranked
+
+
+def get_notes(subject_id: int = None, search: str = None,
+              limit: int = None, offset: int = 0) -> list:
+    """Get notes, optionally filtered by subject and a title/topic/content keyword, with paging.
+
+    Keyword searches are ordered by relevance (title matches weigh most),
+    everything else newest first.
+    """
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("""
+
+    joins, where, params, ranked = _note_filters(subject_id, search)
+    query = """
         SELECT n.*, s.name as subject_name, s.colour as subject_colour
         FROM notes n
         JOIN subjects s ON n.subject_id = s.id
+    """ + joins + where
+    if ranked:
+        query += " ORDER BY bm25(notes_fts, 10.0, 5.0, 1.0), n.updated_at DESC"
+    else:
+        query += " ORDER BY n.updated_at DESC, n.id DESC"
+
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+    cursor.execute(query, params)
+    notes = cursor.fetchall()
+    conn.close()
+    return rows_to_dicts(notes)
+
+
+def get_favourite_notes(preview_only: bool = False) -> list:
+    """Get all favourite notes.
+
+    With preview_only, content is replaced by `preview` (its first 500
+    characters, cut in SQL) and `content_length`.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    columns = "n.*"
+    if preview_only:
+        columns = """n.id, n.subject_id, n.title, n.topic, n.is_favourite,
+                     n.created_at, n.updated_at,
+                     substr(n.content, 1, 500) as preview,
+                     length(n.content) as content_length"""
+    cursor.execute(f"""
+        SELECT {columns}, s.name as subject_name, s.colour as subject_colour
+        FROM notes n
+        JOIN subjects s ON n.subject_id = s.id
         WHERE n.is_favourite = 1
         ORDER BY n.updated_at DESC
     """)
@@ -2459,47 +2918,28 @@ def get_favourite_notes() -> list:
 
 def search_notes(query: str, subject_id: int = None) -> list:
     """Search notes by keyword in title, topic, or content."""
-    conn = get_connection()
-    cursor = conn.cursor()
+    return get_notes(subject_id=subject_id, search=query)
 
-    search_term = f"%{query}%"
 
-    if subject_id:
-        cursor.execute("""
-            SELECT n.*, s.name as subject_name, s.colour as subject_colour
-            FROM notes n
-            JOIN subjects s ON n.subject_id = s.id
-            WHERE n.subject_id = ?
-              AND (n.title LIKE ? OR n.topic LIKE ? OR n.content LIKE ?)
-            ORDER BY n.updated_at DESC
-        """, (subject_id, search_term, search_term, search_term))
-    else:
-        cursor.execute("""
-            SELECT n.*, s.name as subject_name, s.colour as subject_colour
-            FROM notes n
-            JOIN subjects s ON n.subject_id = s.id
-            WHERE n.title LIKE ? OR n.topic LIKE ? OR n.content LIKE ?
-            ORDER BY n.updated_at DESC
-        """, (search_term, search_term, search_term))
+def _fts_match_query(text: str) -> str:
+    """Turn free text into an FTS5 MATCH string: every word, as a prefix.
 
-    notes = cursor.fetchall()
-    conn.close()
-    return rows_to_dicts(notes)
+    Each word is quoted so punctuation in the search box can't be read as
+    FTS syntax. Returns None if there are no words to match.
+    """
+    words = text.split()
+    if not words:
+        return None
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
 
 
-def get_notes_count(subject_id: int = None) -> int:
-    """Get count of notes, optionally filtered by subject."""
+def get_notes_count(subject_id: int = None, search: str = None) -> int:
+    """Count notes matching the same filters as get_notes."""
     conn = get_connection()
     cursor = conn.cursor()
 
-    if subject_id:
-        cursor.execute(
-            "SELECT COUNT(*) as count FROM notes WHERE subject_id = ?",
-            (subject_id,)
-        )
-    else:
-        cursor.execute("SELECT COUNT(*) as count FROM notes")
-
+    joins, where, params, _ = _note_filters(subject_id, search)
+    cursor.execute("SELECT COUNT(*) as count FROM notes n" + joins + where, params)
     result = cursor.fetchone()
     conn.close()
     return result['count'] if result else 0
@@ -2610,6 +3050,31 @@ def get_note_images_count() -> int:
     return result['count'] if result else 0
 
 
+def get_cached_ocr(image_hash: str) -> dict:
+    """Get a cached OCR result (text, words JSON, confidence) for an image hash."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT text, words, confidence FROM ocr_cache WHERE image_hash = ?",
+        (image_hash,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def add_cached_ocr(image_hash: str, text: str, words: str, confidence: float):
+    """Cache an OCR result. `words` is the JSON-encoded word/confidence list."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT OR REPLACE INTO ocr_cache (image_hash, text, words, confidence)
+        VALUES (?, ?, ?, ?)
+    """, (image_hash, text, words, confidence))
+    conn.commit()
+    conn.close()
+
+
 # =============================================================================
 # PAST PAPER FUNCTIONS
 # =============================================================================
@@ -2636,13 +3101,17 @@ def add_past_paper(subject_id: int, paper_name: str, total_marks: int,
     return paper_id
 
 
-def update_paper_summary(paper_id: int, ai_summary: str):
-    """Update the AI summary for a paper."""
+def update_paper_summary(paper_id: int, ai_summary: str, key_topics: str = None):
+    """Update the AI summary for a paper.
+
+    key_topics is the comma-separated topic list shown in the papers list,
+    stored alongside the JSON summary so listing papers needs no parsing.
+    """
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "UPDATE past_papers SET ai_summary = ? WHERE id = ?",
-        (ai_summary, paper_id)
+        "UPDATE past_papers SET ai_summary = ?, key_topics = ? WHERE id = ?",
+        (ai_summary, key_topics, paper_id)
     )
     conn.commit()
     conn.close()
@@ -2669,6 +3138,30 @@ def add_paper_question(paper_id: int, question_number: str, max_marks: int,
     return question_id
 
 
+def add_paper_questions_bulk(paper_id: int, questions: list):
+    """Add several questions to a past paper in one transaction.
+
+    Each question is a dict with the add_paper_question() fields
+    (question_number, max_marks and optionally marks_achieved, topic, notes,
+    question_text, question_type, difficulty, ai_analysis).
+    """
+    if not questions:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT INTO paper_questions
+        (paper_id, question_number, max_marks, marks_achieved, topic, notes,
+         question_text, question_type, difficulty, ai_analysis)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(paper_id, q['question_number'], q['max_marks'], q.get('marks_achieved', 0),
+           q.get('topic'), q.get('notes'), q.get('question_text'), q.get('question_type'),
+           q.get('difficulty'), q.get('ai_analysis'))
+          for q in questions])
+    conn.commit()
+    conn.close()
+
+
 def get_question_type_stats(subject_id: int = None) -> list:
     """Get statistics by question type."""
     conn = get_connection()
@@ -2793,19 +3286,10 @@ def get_latest_analysis_report(subject_id: int = None, report_type: str = None)
     return dict(result) if result else None
 
 
-def get_all_questions(subject_id: int = None, topic: str = None,
-                      question_type: str = None) -> list:
-    """Get all questions with optional filters."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    query = """
-        SELECT pq.*, pp.paper_name, pp.exam_board, pp.year, s.name as subject_name
-        FROM paper_questions pq
-        JOIN past_papers pp ON pq.paper_id = pp.id
-        JOIN subjects s ON pp.subject_id = s.id
-        WHERE 1=1
-    """
+def _question_filters(subject_id: int = None, topic: str = None,
+                      question_type: str = None) -> tuple:
+    """Build the WHERE clause and params shared by get_all_questions/get_question_count."""
+    query = " WHERE 1=1"
     params = []
 
     if subject_id:
@@ -2818,7 +3302,27 @@ def get_all_questions(subject_id: int = None, topic: str = None,
         query += " AND pq.question_type = ?"
         params.append(question_type)
 
-    query += " ORDER BY pp.year DESC, pp.paper_name, pq.question_number"
+    return query, params
+
+
+def get_all_questions(subject_id: int = None, topic: str = None,
+                      question_type: str = None, limit: int = None,
+                      offset: int = 0) -> list:
+    """Get all questions with optional filters and paging."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    where, params = _question_filters(subject_id, topic, question_type)
+    query = """
+        SELECT pq.*, pp.paper_name, pp.exam_board, pp.year, s.name as subject_name
+        FROM paper_questions pq
+        JOIN past_papers pp ON pq.paper_id = pp.id
+        JOIN subjects s ON pp.subject_id = s.id
+    """ + where + " ORDER BY pp.year DESC, pp.paper_name, pq.question_number, pq.id"
+
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
 
     cursor.execute(query, params)
     results = cursor.fetchall()
@@ -2826,29 +3330,53 @@ def get_all_questions(subject_id: int = None, topic: str = None,
     return rows_to_dicts(results)
 
 
+def get_question_count(subject_id: int = None, topic: str = None,
+                       question_type: str = None) -> int:
+    """Count questions matching the same filters as get_all_questions."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    where, params = _question_filters(subject_id, topic, question_type)
+    cursor.execute("""
+        SELECT COUNT(*) as count
+        FROM paper_questions pq
+        JOIN past_papers pp ON pq.paper_id = pp.id
+    """ + where, params)
+    count = cursor.fetchone()['count']
+    conn.close()
+    return count
+
+
 def get_all_past_papers(subject_id: int = None) -> list:
-    """Get all past papers, optionally filtered by subject."""
+    """Get all past papers, optionally filtered by subject.
+
+    Each paper carries its question marks total (0 when none are scored),
+    a "marks/total" score string and the percentage, computed in SQL.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    if subject_id:
-        cursor.execute("""
-            SELECT pp.*, s.name as subject_name, s.colour as subject_colour,
-                   (SELECT SUM(marks_achieved) FROM paper_questions WHERE paper_id = pp.id) as marks_achieved
-            FROM past_papers pp
-            JOIN subjects s ON pp.subject_id = s.id
-            WHERE pp.subject_id = ?
-            ORDER BY pp.completed_at DESC
-        """, (subject_id,))
-    else:
-        cursor.execute("""
+    query = """
+        SELECT p.*,
+               p.marks_achieved || '/' || MAX(p.total_marks, 1) as score,
+               100.0 * p.marks_achieved / MAX(p.total_marks, 1) as percentage
+        FROM (
             SELECT pp.*, s.name as subject_name, s.colour as subject_colour,
-                   (SELECT SUM(marks_achieved) FROM paper_questions WHERE paper_id = pp.id) as marks_achieved
+                   COALESCE((SELECT SUM(marks_achieved) FROM paper_questions
+                             WHERE paper_id = pp.id), 0) as marks_achieved
             FROM past_papers pp
             JOIN subjects s ON pp.subject_id = s.id
-            ORDER BY pp.completed_at DESC
-        """)
+            WHERE 1=1
+    """
+    params = []
+
+    if subject_id:
+        query += " AND pp.subject_id = ?"
+        params.append(subject_id)
+
+    query += ") p ORDER BY p.completed_at DESC"
 
+    cursor.execute(query, params)
     papers = cursor.fetchall()
     conn.close()
     return rows_to_dicts(papers)
@@ -2945,39 +3473,35 @@ def get_topic_performance(subject_id: int = None) -> list:
 
 
 def get_subject_paper_stats(subject_id: int = None) -> list:
-    """Get overall stats for each subject from past papers."""
+    """Get overall stats for each subject from past papers, in one grouped query.
+
+    Question marks are summed per paper before joining, so a paper's
+    total_marks is counted once rather than once per question.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
+    query = """
+        SELECT
+            s.id as subject_id,
+            s.name as subject_name,
+            s.colour as subject_colour,
+            COUNT(pp.id) as paper_count,
+            SUM(pp.total_marks) as total_possible,
+            SUM(pm.marks_achieved) as total_achieved,
+            ROUND(CAST(SUM(pm.marks_achieved) AS FLOAT) / NULLIF(SUM(pp.total_marks), 0) * 100, 1) as average_percentage
+        FROM subjects s
+        LEFT JOIN past_papers pp ON s.id = pp.subject_id
+        LEFT JOIN (
+            SELECT paper_id, SUM(marks_achieved) as marks_achieved
+            FROM paper_questions
+            GROUP BY paper_id
+        ) pm ON pm.paper_id = pp.id
+    """
     if subject_id:
-        cursor.execute("""
-            SELECT
-                s.id as subject_id,
-                s.name as subject_name,
-                s.colour as subject_colour,
-                COUNT(DISTINCT pp.id) as paper_count,
-                SUM(pp.total_marks) as total_possible,
-                SUM(pq.marks_achieved) as total_achieved,
-                ROUND(CAST(SUM(pq.marks_achieved) AS FLOAT) / SUM(pp.total_marks) * 100, 1) as average_percentage
-            FROM subjects s
-            LEFT JOIN past_papers pp ON s.id = pp.subject_id
-            LEFT JOIN paper_questions pq ON pp.id = pq.paper_id
-            WHERE s.id = ?
-            GROUP BY s.id
-        """, (subject_id,))
+        cursor.execute(query + " WHERE s.id = ? GROUP BY s.id", (subject_id,))
     else:
-        cursor.execute("""
-            SELECT
-                s.id as subject_id,
-                s.name as subject_name,
-                s.colour as subject_colour,
-                COUNT(DISTINCT pp.id) as paper_count,
-                SUM(pp.total_marks) as total_possible,
-                SUM(pq.marks_achieved) as total_achieved,
-                ROUND(CAST(SUM(pq.marks_achieved) AS FLOAT) / NULLIF(SUM(pp.total_marks), 0) * 100, 1) as average_percentage
-            FROM subjects s
-            LEFT JOIN past_papers pp ON s.id = pp.subject_id
-            LEFT JOIN paper_questions pq ON pp.id = pq.paper_id
+        cursor.execute(query + """
             GROUP BY s.id
             HAVING paper_count > 0
             ORDER BY average_percentage ASC
@@ -3407,17 +3931,21 @@ def get_subject_priority_scores() -> list:
 # ADDITIONAL HELPER FUNCTIONS
 # =============================================================================
 
-def get_completed_homework():
-    """Get all completed homework."""
+def get_completed_homework(limit: int = None):
+    """Get completed homework, most recent due date first."""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("""
+    query = """
         SELECT h.*, s.name as subject_name, s.colour as subject_colour
         FROM homework h
         JOIN subjects s ON h.subject_id = s.id
         WHERE h.completed = 1
         ORDER BY h.due_date DESC
-    """)
+    """
+    if limit is not None:
+        cursor.execute(query + " LIMIT ?", (limit,))
+    else:
+        cursor.execute(query)
     rows = cursor.fetchall()
     conn.close()
     return rows_to_dicts(rows)
@@ -3619,6 +4147,30 @@ def add_assessment_question(assessment_id: int, question_text: str, question_typ
     return question_id
 
 
+def add_assessment_questions_bulk(assessment_id: int, questions: list):
+    """Add several questions to an assessment in one transaction.
+
+    Each question is a dict with the add_assessment_question() fields
+    (question_text, question_type, correct_answer, topic and optionally
+    options, difficulty, source_type, source_id, marks).
+    """
+    if not questions:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT INTO assessment_questions
+        (assessment_id, question_text, question_type, correct_answer, topic,
+         options, difficulty, source_type, source_id, marks)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(assessment_id, q['question_text'], q['question_type'], q['correct_answer'],
+           q['topic'], q.get('options'), q.get('difficulty', 'medium'),
+           q.get('source_type'), q.get('source_id'), q.get('marks', 1))
+          for q in questions])
+    conn.commit()
+    conn.close()
+
+
 def record_response(assessment_id: int, question_id: int, student_answer: str,
                     is_correct: bool, marks_awarded: int = 0, time_taken: int = None,
                     confidence: int = None, ai_evaluation: str = None) -> int:
@@ -3767,55 +4319,99 @@ def get_assessment_responses(assessment_id: int) -> list:
     return rows_to_dicts(responses)
 
 
+def get_cached_questions(subject: str, topics: list) -> list:
+    """Get cached generated questions (topic, payload JSON) for topics of a subject."""
+    topics = list(topics)
+    if not topics:
+        return []
+    conn = get_connection()
+    cursor = conn.cursor()
+    placeholders = ",".join("?" * len(topics))
+    cursor.execute(f"""
+        SELECT topic, question_text, payload FROM question_cache
+        WHERE subject = ? AND topic IN ({placeholders})
+    """, [subject] + topics)
+    questions = cursor.fetchall()
+    conn.close()
+    return rows_to_dicts(questions)
+
+
+def add_cached_questions(subject: str, questions: list):
+    """Add (topic, question_text, payload JSON) rows to the question cache, skipping duplicates."""
+    if not questions:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT OR IGNORE INTO question_cache (subject, topic, question_text, payload)
+        VALUES (?, ?, ?, ?)
+    """, [(subject, topic, question_text, payload)
+          for topic, question_text, payload in questions])
+    conn.commit()
+    conn.close()
+
+
+def get_cached_llm_response(key: str) -> str:
+    """Get an unexpired cached LLM response by key, or None."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT response FROM llm_response_cache
+        WHERE key = ? AND expires_at > datetime('now')
+    """, (key,))
+    row = cursor.fetchone()
+    conn.close()
+    return row['response'] if row else None
+
+
+def set_cached_llm_response(key: str, response: str, ttl_hours: int = 24):
+    """Cache an LLM response for ttl_hours, dropping any expired entries."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM llm_response_cache WHERE expires_at <= datetime('now')")
+    cursor.execute("""
+        INSERT OR REPLACE INTO llm_response_cache (key, response, expires_at)
+        VALUES (?, ?, datetime('now', ?))
+    """, (key, response, f"{ttl_hours:+d} hours"))
+    conn.commit()
+    conn.close()
+
+
 # =============================================================================
 # TOPIC MASTERY FUNCTIONS
 # =============================================================================
 
 def update_topic_mastery(subject_id: int, topic: str, is_correct: bool):
-    """Update mastery level for a topic after an assessment question."""
+    """Update mastery level for a topic after an assessment question.
+
+    topic_mastery is the running per-topic summary, so this is a single
+    upsert rather than a read followed by an insert or update.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    # Check if topic exists
-    cursor.execute("""
-        SELECT * FROM topic_mastery
-        WHERE subject_id = ? AND topic = ?
-    """, (subject_id, topic))
-    existing = cursor.fetchone()
-
-    if existing:
-        # Update existing
-        new_total = existing['total_attempts'] + 1
-        new_correct = existing['correct_attempts'] + (1 if is_correct else 0)
-        new_mastery = (new_correct / new_total) * 100
+    correct = 1 if is_correct else 0
 
-        # Calculate trend (compare with previous)
-        old_mastery = existing['mastery_level']
-        if new_mastery > old_mastery + 5:
-            trend = 'improving'
-        elif new_mastery < old_mastery - 5:
-            trend = 'declining'
-        else:
-            trend = 'stable'
-
-        cursor.execute("""
-            UPDATE topic_mastery
-            SET total_attempts = ?,
-                correct_attempts = ?,
-                mastery_level = ?,
-                trend = ?,
-                last_assessed_at = CURRENT_TIMESTAMP,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE subject_id = ? AND topic = ?
-        """, (new_total, new_correct, new_mastery, trend, subject_id, topic))
-    else:
-        # Insert new
-        mastery = 100 if is_correct else 0
-        cursor.execute("""
-            INSERT INTO topic_mastery
-            (subject_id, topic, mastery_level, total_attempts, correct_attempts, last_assessed_at)
-            VALUES (?, ?, ?, 1, ?, CURRENT_TIMESTAMP)
-        """, (subject_id, topic, mastery, 1 if is_correct else 0))
+    # SET expressions all see the pre-update row, so the trend compares the
+    # new mastery against the old one (moves of more than 5 points count)
+    cursor.execute("""
+        INSERT INTO topic_mastery
+        (subject_id, topic, mastery_level, total_attempts, correct_attempts, last_assessed_at)
+        VALUES (?, ?, ?, 1, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(subject_id, topic) DO UPDATE SET
+            total_attempts = total_attempts + 1,
+            correct_attempts = correct_attempts + excluded.correct_attempts,
+            mastery_level = (correct_attempts + excluded.correct_attempts) * 100.0 / (total_attempts + 1),
+            trend = CASE
+                WHEN (correct_attempts + excluded.correct_attempts) * 100.0 / (total_attempts + 1) > mastery_level + 5
+                    THEN 'improving'
+                WHEN (correct_attempts + excluded.correct_attempts) * 100.0 / (total_attempts + 1) < mastery_level - 5
+                    THEN 'declining'
+                ELSE 'stable'
+            END,
+            last_assessed_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+    """, (subject_id, topic, correct * 100, correct))
 
     conn.commit()
     conn.close()
@@ -3824,7 +4420,13 @@ def update_topic_mastery(subject_id: int, topic: str, is_correct: bool):
 def get_topic_mastery(subject_id: int = None) -> list:
     """Get mastery levels for all topics, optionally filtered by subject."""
     conn = get_connection()
-    cursor = conn.cursor()
+    result = _topic_mastery(conn.cursor(), subject_id)
+    conn.close()
+    return result
+
+
+def _topic_mastery(cursor, subject_id) -> list:
+    """get_topic_mastery() on an existing cursor."""
     if subject_id:
         cursor.execute("""
             SELECT tm.*, s.name as subject_name
@@ -3841,7 +4443,6 @@ def get_topic_mastery(subject_id: int = None) -> list:
             ORDER BY tm.mastery_level ASC
         """)
     mastery = cursor.fetchall()
-    conn.close()
     return rows_to_dicts(mastery)
 
 
@@ -3875,7 +4476,13 @@ def get_weak_topics_from_mastery(subject_id: int = None, threshold: float = 60.0
 def get_strong_topics(subject_id: int = None, threshold: float = 80.0, limit: int = 10) -> list:
     """Get topics above mastery threshold (strengths)."""
     conn = get_connection()
-    cursor = conn.cursor()
+    result = _strong_topics(conn.cursor(), subject_id, threshold, limit)
+    conn.close()
+    return result
+
+
+def _strong_topics(cursor, subject_id, threshold=80.0, limit=10) -> list:
+    """get_strong_topics() on an existing cursor."""
     if subject_id:
         cursor.execute("""
             SELECT tm.*, s.name as subject_name
@@ -3895,7 +4502,6 @@ def get_strong_topics(subject_id: int = None, threshold: float = 80.0, limit: in
             LIMIT ?
         """, (threshold, limit))
     topics = cursor.fetchall()
-    conn.close()
     return rows_to_dicts(topics)
 
 
@@ -3930,6 +4536,7 @@ def sync_exam_requirements_from_papers(subject_id: int = None):
 
     topics = cursor.fetchall()
 
+    rows = []
     for topic_data in topics:
         # Determine importance based on frequency
         freq = topic_data['frequency']
@@ -3942,18 +4549,20 @@ def sync_exam_requirements_from_papers(subject_id: int = None):
         else:
             importance = 'low'
 
-        # Upsert into exam_requirements
-        cursor.execute("""
-            INSERT INTO exam_requirements (subject_id, topic, frequency, typical_marks, importance_level, last_appeared_year)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ON CONFLICT(subject_id, topic) DO UPDATE SET
-                frequency = excluded.frequency,
-                typical_marks = excluded.typical_marks,
-                importance_level = excluded.importance_level,
-                last_appeared_year = excluded.last_appeared_year
-        """, (topic_data['subject_id'], topic_data['topic'], freq,
-              int(topic_data['avg_marks']) if topic_data['avg_marks'] else None,
-              importance, topic_data['last_year']))
+        rows.append((topic_data['subject_id'], topic_data['topic'], freq,
+                     int(topic_data['avg_marks']) if topic_data['avg_marks'] else None,
+                     importance, topic_data['last_year']))
+
+    # Upsert every topic in one statement and one transaction
+    cursor.executemany("""
+        INSERT INTO exam_requirements (subject_id, topic, frequency, typical_marks, importance_level, last_appeared_year)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(subject_id, topic) DO UPDATE SET
+            frequency = excluded.frequency,
+            typical_marks = excluded.typical_marks,
+            importance_level = excluded.importance_level,
+            last_appeared_year = excluded.last_appeared_year
+    """, rows)
 
     conn.commit()
     conn.close()
@@ -3989,7 +4598,13 @@ def get_knowledge_gaps(subject_id: int = None) -> list:
     Returns topics required by exam but not mastered by student.
     """
     conn = get_connection()
-    cursor = conn.cursor()
+    result = _knowledge_gaps(conn.cursor(), subject_id)
+    conn.close()
+    return result
+
+
+def _knowledge_gaps(cursor, subject_id) -> list:
+    """get_knowledge_gaps() on an existing cursor."""
 
     if subject_id:
         cursor.execute("""
@@ -4018,14 +4633,19 @@ def get_knowledge_gaps(subject_id: int = None) -> list:
         """)
 
     gaps = cursor.fetchall()
-    conn.close()
     return rows_to_dicts(gaps)
 
 
 def get_coverage_stats(subject_id: int = None) -> dict:
     """Calculate coverage statistics."""
     conn = get_connection()
-    cursor = conn.cursor()
+    result = _coverage_stats(conn.cursor(), subject_id)
+    conn.close()
+    return result
+
+
+def _coverage_stats(cursor, subject_id) -> dict:
+    """get_coverage_stats() on an existing cursor."""
 
     # Total exam topics
     if subject_id:
@@ -4067,8 +4687,6 @@ def get_coverage_stats(subject_id: int = None) -> dict:
         """)
     topics_mastered = cursor.fetchone()['count']
 
-    conn.close()
-
     coverage_pct = (topics_mastered / total_exam_topics * 100) if total_exam_topics > 0 else 0
 
     return {
@@ -4079,6 +4697,22 @@ def get_coverage_stats(subject_id: int = None) -> dict:
     }
 
 
+def get_gap_dashboard(subject_id: int = None) -> dict:
+    """
+    Get coverage stats, knowledge gaps and strengths for the gap analysis tab.
+    Runs all three queries on one connection instead of one per call.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    dashboard = {
+        'coverage': _coverage_stats(cursor, subject_id),
+        'gaps': _knowledge_gaps(cursor, subject_id),
+        'strengths': _strong_topics(cursor, subject_id)
+    }
+    conn.close()
+    return dashboard
+
+
 # =============================================================================
 # ASSESSMENT ANALYTICS FUNCTIONS
 # =============================================================================
@@ -4086,7 +4720,13 @@ def get_coverage_stats(subject_id: int = None) -> dict:
 def get_assessment_stats(subject_id: int = None, days: int = 30) -> dict:
     """Get aggregate assessment statistics."""
     conn = get_connection()
-    cursor = conn.cursor()
+    result = _assessment_stats(conn.cursor(), subject_id, days)
+    conn.close()
+    return result
+
+
+def _assessment_stats(cursor, subject_id, days=30) -> dict:
+    """get_assessment_stats() on an existing cursor."""
 
     cutoff = (datetime.now() - timedelta(days=days)).isoformat()
 
@@ -4112,7 +4752,6 @@ def get_assessment_stats(subject_id: int = None, days: int = 30) -> dict:
         """, (cutoff,))
 
     stats = cursor.fetchone()
-    conn.close()
 
     total_answered = stats['total_answered'] or 0
     total_correct = stats['total_correct'] or 0
@@ -4127,13 +4766,20 @@ def get_assessment_stats(subject_id: int = None, days: int = 30) -> dict:
 
 
 def get_assessment_progress_over_time(subject_id: int = None, limit: int = 20) -> list:
-    """Get assessment scores over time to show progress."""
+    """Get recent assessment scores (newest first) with their start date."""
     conn = get_connection()
-    cursor = conn.cursor()
+    result = _assessment_progress_over_time(conn.cursor(), subject_id, limit)
+    conn.close()
+    return result
+
+
+def _assessment_progress_over_time(cursor, subject_id, limit=20) -> list:
+    """get_assessment_progress_over_time() on an existing cursor."""
 
     if subject_id:
         cursor.execute("""
-            SELECT id, score_percentage, started_at, assessment_type, subject_id
+            SELECT id, score_percentage, date(started_at) as started_date,
+                   assessment_type, subject_id
             FROM knowledge_assessments
             WHERE subject_id = ? AND status = 'completed'
             ORDER BY started_at DESC
@@ -4141,7 +4787,8 @@ def get_assessment_progress_over_time(subject_id: int = None, limit: int = 20) -
         """, (subject_id, limit))
     else:
         cursor.execute("""
-            SELECT id, score_percentage, started_at, assessment_type, subject_id
+            SELECT id, score_percentage, date(started_at) as started_date,
+                   assessment_type, subject_id
             FROM knowledge_assessments
             WHERE status = 'completed'
             ORDER BY started_at DESC
@@ -4149,14 +4796,19 @@ def get_assessment_progress_over_time(subject_id: int = None, limit: int = 20) -
         """, (limit,))
 
     progress = cursor.fetchall()
-    conn.close()
     return rows_to_dicts(progress)
 
 
 def get_performance_by_question_type(subject_id: int = None) -> list:
     """Get performance by question type."""
     conn = get_connection()
-    cursor = conn.cursor()
+    result = _performance_by_question_type(conn.cursor(), subject_id)
+    conn.close()
+    return result
+
+
+def _performance_by_question_type(cursor, subject_id) -> list:
+    """get_performance_by_question_type() on an existing cursor."""
 
     if subject_id:
         cursor.execute("""
@@ -4180,7 +4832,6 @@ def get_performance_by_question_type(subject_id: int = None) -> list:
         """)
 
     results = cursor.fetchall()
-    conn.close()
 
     performance = []
     for r in results:
@@ -4195,6 +4846,23 @@ def get_performance_by_question_type(subject_id: int = None) -> list:
     return performance
 
 
+def get_progress_dashboard(subject_id: int = None, days: int = 30) -> dict:
+    """
+    Get everything the progress report tab shows in one connection:
+    overview stats, recent scores, topic mastery and question-type performance.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    dashboard = {
+        'stats': _assessment_stats(cursor, subject_id, days),
+        'progress': _assessment_progress_over_time(cursor, subject_id, limit=10),
+        'mastery': _topic_mastery(cursor, subject_id),
+        'type_performance': _performance_by_question_type(cursor, subject_id)
+    }
+    conn.close()
+    return dashboard
+
+
 def get_available_topics_for_subject(subject_id: int) -> list:
     """Get available topics for assessment from past papers and flashcards."""
     conn = get_connection()
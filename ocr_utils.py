@@ -1,9 +1,10 @@
 """
 Study Assistant - OCR Utilities
-Image quality assessment for OCR.
+Image quality assessment and preprocessing for OCR.
 """
 
 import numpy as np
+from io import BytesIO
 from PIL import Image
 from typing import Tuple
 
@@ -29,10 +30,9 @@ def assess_image_quality(image: Image.Image) -> Tuple[int, str]:
         return 50, "Quality check unavailable (OpenCV not installed)"
 
     try:
-        # Convert PIL to OpenCV format
+        # Convert PIL straight to OpenCV grayscale
         rgb = np.array(image.convert('RGB'))
-        cv_img = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
-        gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
 
         # 1. Sharpness (Laplacian variance) - 0-40 points
         laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
@@ -90,6 +90,33 @@ def assess_image_quality(image: Image.Image) -> Tuple[int, str]:
         return 50, f"Quality check error: {str(e)}"
 
 
+def prepare_for_ocr(image: Image.Image) -> bytes:
+    """
+    Clean up a photo of notes for OCR and return it as PNG bytes.
+
+    Converts to grayscale, smooths sensor noise and binarizes with Otsu's
+    threshold, so the text is black on white and the upload is much smaller.
+    Without OpenCV the image is only converted to grayscale.
+
+    Args:
+        image: PIL Image to prepare
+
+    Returns:
+        PNG-encoded image bytes
+    """
+    if CV2_AVAILABLE:
+        gray = cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        prepared = Image.fromarray(bw)
+    else:
+        prepared = image.convert('L')
+
+    buffer = BytesIO()
+    prepared.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
 def is_opencv_available() -> bool:
     """Check if OpenCV is available."""
     return CV2_AVAILABLE
@@ -3,11 +3,64 @@ Study Assistant - Exams Page
 Exam calendar and countdown with Google Calendar sync.
 """
 
+import time
+from string import Template
 import streamlit as st
 import database as db
-from utils import days_until
+from datetime import date
+from utils import days_between
 import google_calendar as gcal
 
+# How long a Google Calendar auth check is trusted before re-validating
+AUTH_CHECK_TTL_SECONDS = 300
+
+# Countdown card for one upcoming exam, compiled once at import
+_EXAM_CARD_TEMPLATE = Template("""
+<div style="background: linear-gradient(135deg, ${colour}22, ${colour}11);
+            border-left: 4px solid ${colour};
+            padding: 15px;
+            margin: 10px 0;
+            border-radius: 0 12px 12px 0;">
+    <div style="display: flex; justify-content: space-between; align-items: center;">
+        <span style="background: ${colour}; color: white; padding: 4px 12px; border-radius: 20px; font-size: 12px;">${urgency}</span>
+        <span style="font-size: 2rem; font-weight: bold; color: ${colour};">${days} days</span>
+    </div>
+    <h3 style="margin: 10px 0; color: #333;">${sync_icon} ${name}</h3>
+    <p style="margin: 5px 0; color: #666;">
+        <strong>${subject}</strong> • ${exam_date}
+    </p>
+</div>
+""")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_calendar_events(days_ahead: int) -> list:
+    """Fetch upcoming calendar events, reused for five minutes.
+
+    Calendar edits happen outside this app, so the Refresh button clears
+    the cache rather than keying it on db.data_version(). Raises on
+    failure so that errors are never cached.
+    """
+    from cloud.google_calendar import get_client
+    success, msg, events = get_client().get_calendar_events(days_ahead=days_ahead)
+    if not success:
+        raise RuntimeError(msg)
+    return events
+
+
+def _calendar_authenticated(client) -> bool:
+    """Check calendar auth, reusing a positive result for AUTH_CHECK_TTL_SECONDS.
+
+    A negative result is never reused, so connecting in Settings shows up
+    as soon as the user comes back to this page.
+    """
+    now = time.monotonic()
+    cached = st.session_state.get('calendar_auth_state')
+    if cached is None or not cached[0] or now - cached[1] > AUTH_CHECK_TTL_SECONDS:
+        cached = (client.is_authenticated(), now)
+        st.session_state.calendar_auth_state = cached
+    return cached[0]
+
 
 def render():
     """Render the Exams calendar page."""
@@ -28,8 +81,9 @@ def render():
     with tab1:
         exams = db.get_all_exams()
         if exams:
+            today_ord = date.today().toordinal()
             for exam in exams:
-                days = days_until(exam['exam_date'])
+                days = days_between(exam['exam_date'], today_ord)
                 if days < 0:
                     continue  # Skip past exams
 
@@ -50,22 +104,15 @@ def render():
                 # Sync indicator
                 sync_icon = "☁️" if exam.get('google_calendar_id') else ""
 
-                st.markdown(f"""
-                <div style="background: linear-gradient(135deg, {urgency_color}22, {urgency_color}11);
-                            border-left: 4px solid {urgency_color};
-                            padding: 15px;
-                            margin: 10px 0;
-                            border-radius: 0 12px 12px 0;">
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <span style="background: {urgency_color}; color: white; padding: 4px 12px; border-radius: 20px; font-size: 12px;">{urgency_text}</span>
-                        <span style="font-size: 2rem; font-weight: bold; color: {urgency_color};">{days} days</span>
-                    </div>
-                    <h3 style="margin: 10px 0; color: #333;">{sync_icon} {exam['name']}</h3>
-                    <p style="margin: 5px 0; color: #666;">
-                        <strong>{exam['subject_name']}</strong> • {exam['exam_date']}
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(_EXAM_CARD_TEMPLATE.substitute(
+                    colour=urgency_color,
+                    urgency=urgency_text,
+                    days=days,
+                    sync_icon=sync_icon,
+                    name=exam['name'],
+                    subject=exam['subject_name'],
+                    exam_date=exam['exam_date']
+                ), unsafe_allow_html=True)
 
                 col1, col2, col3 = st.columns([3, 1, 1])
                 with col2:
@@ -184,7 +231,7 @@ def _render_calendar_import(subjects):
         from cloud.google_calendar import get_client
         client = get_client()
 
-        if not client.is_authenticated():
+        if not _calendar_authenticated(client):
             st.warning("Connect to Google Calendar first in Settings > Backup & Sync")
             return
 
@@ -193,25 +240,33 @@ def _render_calendar_import(subjects):
         Events will be fetched from the "Study Assistant Exams" calendar.
         """)
 
-        if st.button("🔍 Fetch Calendar Events", type="primary"):
-            with st.spinner("Fetching events..."):
-                success, msg, events = client.get_calendar_events(days_ahead=90)
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            fetch = st.button("🔍 Fetch Calendar Events", type="primary")
+        with col2:
+            refresh = st.button("🔄 Refresh", help="Fetch again, picking up recent Google Calendar edits")
 
-                if success:
+        if fetch or refresh:
+            if refresh:
+                _fetch_calendar_events.clear()
+            with st.spinner("Fetching events..."):
+                try:
+                    events = _fetch_calendar_events(90)
+                except RuntimeError as e:
+                    st.error(str(e))
+                else:
                     if events:
-                        st.session_state.calendar_events = events
+                        st.session_state.calendar_events = {e['id']: e for e in events}
                         st.success(f"Found {len(events)} upcoming events")
                     else:
                         st.info("No upcoming events found in the calendar")
-                else:
-                    st.error(msg)
 
         # Show fetched events for import
         if 'calendar_events' in st.session_state and st.session_state.calendar_events:
             st.markdown("---")
             st.markdown("#### Events to Import")
 
-            for event in st.session_state.calendar_events:
+            for event in list(st.session_state.calendar_events.values()):
                 with st.expander(f"📅 {event['name']} - {event['date']}"):
                     st.caption(f"Date: {event['date']}")
                     if event.get('description'):
@@ -237,11 +292,8 @@ def _render_calendar_import(subjects):
                         # Store the calendar event ID
                         db.update_exam_calendar_id(exam_id, event['id'])
                         st.success(f"Imported: {name}")
-                        # Remove from list
-                        st.session_state.calendar_events = [
-                            e for e in st.session_state.calendar_events
-                            if e['id'] != event['id']
-                        ]
+                        # Remove from the pending events
+                        st.session_state.calendar_events.pop(event['id'], None)
                         st.rerun()
 
     except ImportError:
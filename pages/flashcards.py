@@ -5,6 +5,24 @@ Spaced repetition flashcard system with SM-2 algorithm.
 
 import streamlit as st
 import database as db
+import pandas as pd
+
+CARDS_PER_PAGE = 50
+
+# SM-2 quality rating -> label shown in the review UI
+RATING_LABELS = {
+    1: "😰 Again",
+    2: "😕 Hard",
+    3: "😐 Okay",
+    4: "🙂 Good",
+    5: "😄 Easy"
+}
+
+
+@st.cache_data(ttl="60s", max_entries=32)
+def _cached_flashcard_count(subject_id, version):
+    """Card count for the All Cards pager. `version` is db.data_version()."""
+    return db.get_flashcards_count(subject_id)
 
 
 def render():
@@ -17,6 +35,9 @@ def render():
         st.warning("Add your subjects first in **Subjects** (under Settings) to start creating flashcards.")
         st.stop()
 
+    subjects_by_id = {s['id']: s for s in subjects}
+    subject_ids = list(subjects_by_id)
+
     # Session state for review
     if 'review_mode' not in st.session_state:
         st.session_state.review_mode = False
@@ -39,18 +60,17 @@ def render():
 
             col1, col2 = st.columns(2)
             with col1:
-                review_subject = st.selectbox(
+                review_subject_id = st.selectbox(
                     "Select subject:",
-                    options=[None] + subjects,
-                    format_func=lambda x: "All Subjects" if x is None else x['name'],
+                    options=[None] + subject_ids,
+                    format_func=lambda x: "All Subjects" if x is None else subjects_by_id[x]['name'],
                     key="review_subject_select"
                 )
             with col2:
                 review_limit = st.number_input("Cards to review:", min_value=5, max_value=100, value=20)
 
             if st.button("🎯 Start Review", type="primary"):
-                subject_id = review_subject['id'] if review_subject else None
-                cards = db.get_due_flashcards(subject_id=subject_id, limit=review_limit)
+                cards = db.get_due_flashcards(subject_id=review_subject_id, limit=review_limit)
                 if cards:
                     st.session_state.review_mode = True
                     st.session_state.review_cards = cards
@@ -61,75 +81,17 @@ def render():
                     st.success("No cards due for review! 🎉")
 
         else:
-            # Review mode
-            cards = st.session_state.review_cards
-            index = st.session_state.review_index
-
-            if index >= len(cards):
-                st.success("🎉 Review Complete!")
-                st.markdown(f"You reviewed **{len(cards)}** cards.")
-                if st.button("Finish"):
-                    st.session_state.review_mode = False
-                    st.rerun()
-            else:
-                card = cards[index]
-                progress = (index + 1) / len(cards)
-                st.progress(progress, text=f"Card {index + 1} of {len(cards)}")
-
-                st.markdown(f"**Subject:** {card['subject_name']}")
-                if card.get('topic'):
-                    st.caption(f"Topic: {card['topic']}")
-
-                # Question card
-                st.markdown(f"""
-                <div class="flashcard">
-                    <div style="font-size: 1.3rem;">{card['question']}</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-                if not st.session_state.show_answer:
-                    if st.button("Show Answer", type="primary", use_container_width=True):
-                        st.session_state.show_answer = True
-                        st.rerun()
-                else:
-                    st.markdown(f"""
-                    <div style="background: #e8f5e9; padding: 20px; border-radius: 12px; margin: 10px 0;">
-                        <strong>Answer:</strong><br>{card['answer']}
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                    st.markdown("**How well did you know this?**")
-                    col1, col2, col3, col4, col5 = st.columns(5)
-
-                    ratings = [
-                        (col1, "😰 Again", 1),
-                        (col2, "😕 Hard", 2),
-                        (col3, "😐 Okay", 3),
-                        (col4, "🙂 Good", 4),
-                        (col5, "😄 Easy", 5)
-                    ]
-
-                    for col, label, quality in ratings:
-                        with col:
-                            if st.button(label, key=f"rate_{quality}"):
-                                db.review_flashcard(card['id'], quality)
-                                st.session_state.review_index += 1
-                                st.session_state.show_answer = False
-                                st.rerun()
-
-                if st.button("Exit Review"):
-                    st.session_state.review_mode = False
-                    st.rerun()
+            _render_review_session()
 
     # TAB 2: Add Cards
     with tab2:
         st.markdown("### Add New Flashcard")
 
         with st.form("add_flashcard"):
-            subject = st.selectbox(
+            subject_id = st.selectbox(
                 "Subject *",
-                options=subjects,
-                format_func=lambda x: x['name']
+                options=subject_ids,
+                format_func=lambda x: subjects_by_id[x]['name']
             )
             topic = st.text_input("Topic (optional)", placeholder="e.g., Cell Biology, Photosynthesis")
             question = st.text_area("Question *", placeholder="e.g., What is the function of mitochondria?")
@@ -138,7 +100,7 @@ def render():
             if st.form_submit_button("Add Flashcard", type="primary"):
                 if question and answer:
                     db.add_flashcard(
-                        subject_id=subject['id'],
+                        subject_id=subject_id,
                         question=question,
                         answer=answer,
                         topic=topic
@@ -150,31 +112,52 @@ def render():
 
     # TAB 3: All Cards
     with tab3:
-        all_cards = db.get_all_flashcards()
-        if all_cards:
-            # Group by subject
-            filter_subject = st.selectbox(
-                "Filter by subject:",
-                options=[None] + subjects,
-                format_func=lambda x: "All Subjects" if x is None else x['name'],
-                key="filter_cards"
-            )
+        version = db.data_version()
+        if _cached_flashcard_count(None, version):
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                subject_id = st.selectbox(
+                    "Filter by subject:",
+                    options=[None] + subject_ids,
+                    format_func=lambda x: "All Subjects" if x is None else subjects_by_id[x]['name'],
+                    key="filter_cards"
+                )
 
-            filtered = all_cards
-            if filter_subject:
-                filtered = [c for c in filtered if c['subject_id'] == filter_subject['id']]
+            total = _cached_flashcard_count(subject_id, version)
+            page_count = max(1, -(-total // CARDS_PER_PAGE))
 
-            st.markdown(f"**{len(filtered)} cards**")
+            with col2:
+                page = st.number_input("Page", min_value=1, max_value=page_count, value=1)
 
-            for card in filtered[:50]:
-                with st.expander(f"{card['question'][:50]}..."):
-                    st.markdown(f"**Q:** {card['question']}")
-                    st.markdown(f"**A:** {card['answer']}")
-                    st.caption(f"Subject: {card['subject_name']} | Topic: {card.get('topic', 'N/A')}")
+            st.markdown(f"**{total} cards** (page {page} of {page_count})")
 
-                    if st.button("🗑️ Delete", key=f"del_card_{card['id']}"):
-                        db.delete_flashcard(card['id'])
-                        st.rerun()
+            # One table widget instead of an expander + button per card
+            shown = db.get_flashcards_page(
+                subject_id=subject_id,
+                limit=CARDS_PER_PAGE,
+                offset=(page - 1) * CARDS_PER_PAGE
+            )
+            cards_df = pd.DataFrame(shown, columns=["question", "answer", "subject_name", "topic"])
+            table = st.dataframe(
+                cards_df,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "question": "Question",
+                    "answer": "Answer",
+                    "subject_name": "Subject",
+                    "topic": "Topic"
+                },
+                on_select="rerun",
+                selection_mode="multi-row",
+                key=f"all_cards_table_{subject_id}_{page}"
+            )
+
+            selected_rows = table.selection.rows
+            if st.button(f"🗑️ Delete Selected ({len(selected_rows)})",
+                         disabled=not selected_rows, key="del_selected_cards"):
+                db.delete_flashcards_bulk([shown[i]['id'] for i in selected_rows])
+                st.rerun()
         else:
             st.info("No flashcards yet. Add some using the 'Add Cards' tab!")
 
@@ -197,3 +180,66 @@ def render():
                      help="View your spaced repetition stats"):
             st.session_state.selected_page = "SRS Analytics"
             st.rerun()
+
+
+@st.fragment
+def _render_review_session():
+    """Render the active review session.
+
+    Runs as a fragment, so showing an answer or rating a card only reruns
+    this panel instead of the whole page.
+    """
+    cards = st.session_state.review_cards
+    index = st.session_state.review_index
+
+    if index >= len(cards):
+        st.success("🎉 Review Complete!")
+        st.markdown(f"You reviewed **{len(cards)}** cards.")
+        if st.button("Finish"):
+            st.session_state.review_mode = False
+            st.rerun()
+    else:
+        card = cards[index]
+        progress = (index + 1) / len(cards)
+        st.progress(progress, text=f"Card {index + 1} of {len(cards)}")
+
+        st.markdown(f"**Subject:** {card['subject_name']}")
+        if card.get('topic'):
+            st.caption(f"Topic: {card['topic']}")
+
+        # Question card
+        st.markdown(f"""
+        <div class="flashcard">
+            <div style="font-size: 1.3rem;">{card['question']}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        if not st.session_state.show_answer:
+            if st.button("Show Answer", type="primary", use_container_width=True):
+                st.session_state.show_answer = True
+                st.rerun(scope="fragment")
+        else:
+            st.markdown(f"""
+            <div style="background: #e8f5e9; padding: 20px; border-radius: 12px; margin: 10px 0;">
+                <strong>Answer:</strong><br>{card['answer']}
+            </div>
+            """, unsafe_allow_html=True)
+
+            # One radio widget instead of five buttons; picking a rating advances
+            quality = st.radio(
+                "**How well did you know this?**",
+                options=list(RATING_LABELS),
+                format_func=RATING_LABELS.get,
+                index=None,
+                horizontal=True,
+                key=f"rate_{card['id']}"
+            )
+            if quality is not None:
+                db.review_flashcard(card['id'], quality)
+                st.session_state.review_index += 1
+                st.session_state.show_answer = False
+                st.rerun(scope="fragment")
+
+        if st.button("Exit Review"):
+            st.session_state.review_mode = False
+            st.rerun()
@@ -3,11 +3,52 @@ Study Assistant - Focus Timer Page
 Pomodoro-style focus sessions with logging.
 """
 
+import time
 import streamlit as st
-from datetime import datetime
+import jinja2
+from datetime import date
 import database as db
 
 
+@st.cache_data(ttl=60, max_entries=32)
+def _stats_cards_html(version: int, today: date) -> str:
+    """Build today's three stat cards as one HTML block.
+
+    `version` is db.data_version() and `today` rolls the cache over at
+    midnight, so cached cards never outlive a write or the day they describe.
+    """
+    focus_today = db.get_total_focus_minutes_today()
+    sessions_today = db.get_focus_sessions_today()
+    streak = db.get_focus_streak()
+    return f"""
+    <div class="flex gap-4">
+        <div class="stat-card-green" style="flex: 1;">
+            <h2 style="color: white; margin: 0;">{focus_today} min</h2>
+            <p style="margin: 5px 0 0 0;">Focus Today</p>
+        </div>
+        <div class="stat-card" style="flex: 1;">
+            <h2 style="color: white; margin: 0;">{len(sessions_today)}</h2>
+            <p style="margin: 5px 0 0 0;">Sessions Today</p>
+        </div>
+        <div class="stat-card-orange" style="flex: 1;">
+            <h2 style="color: white; margin: 0;">{streak} days</h2>
+            <p style="margin: 5px 0 0 0;">Focus Streak</p>
+        </div>
+    </div>
+    """
+
+
+@st.cache_resource
+def _recent_sessions_template():
+    """Compile the Recent Sessions list template once per process."""
+    return jinja2.Template("""{% for s in rows %}
+<div style="background: #f8f9fa; padding: 10px; margin: 5px 0; border-radius: 8px;">
+{{ '✅' if s.completed else '⏸️' }} <strong>{{ s.subject_name }}</strong>{% if s.topic %} • {{ s.topic }}{% endif %} - {{ s.actual_minutes or 0 }} min
+<span style="color: #666; font-size: 12px; float: right;">{{ s.started_at[:10] }}</span>
+</div>
+{% endfor %}""", autoescape=True)
+
+
 def render():
     """Render the Focus Timer page."""
     st.title("⏱️ Focus Timer")
@@ -20,46 +61,26 @@ def render():
     # Session state
     if 'timer_running' not in st.session_state:
         st.session_state.timer_running = False
-    if 'timer_start_time' not in st.session_state:
-        st.session_state.timer_start_time = None
+    if 'timer_start_mono' not in st.session_state:
+        st.session_state.timer_start_mono = None
     if 'timer_duration' not in st.session_state:
         st.session_state.timer_duration = 25
     if 'timer_subject_id' not in st.session_state:
         st.session_state.timer_subject_id = None
     if 'timer_topic' not in st.session_state:
         st.session_state.timer_topic = None
+    if 'timer_completed' not in st.session_state:
+        st.session_state.timer_completed = False
 
     # Today's stats
-    focus_today = db.get_total_focus_minutes_today()
-    sessions_today = db.get_focus_sessions_today()
-
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown(f"""
-        <div class="stat-card-green">
-            <h2 style="color: white; margin: 0;">{focus_today} min</h2>
-            <p style="margin: 5px 0 0 0;">Focus Today</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class="stat-card">
-            <h2 style="color: white; margin: 0;">{len(sessions_today)}</h2>
-            <p style="margin: 5px 0 0 0;">Sessions Today</p>
-        </div>
-        """, unsafe_allow_html=True)
-    with col3:
-        streak = db.get_focus_streak()
-        st.markdown(f"""
-        <div class="stat-card-orange">
-            <h2 style="color: white; margin: 0;">{streak} days</h2>
-            <p style="margin: 5px 0 0 0;">Focus Streak</p>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(_stats_cards_html(db.data_version(), date.today()), unsafe_allow_html=True)
 
     st.markdown("---")
 
-    if not st.session_state.timer_running:
+    if st.session_state.timer_completed:
+        _render_session_complete()
+
+    elif not st.session_state.timer_running:
         # Timer setup
         st.markdown("### Start a Focus Session")
 
@@ -103,76 +124,8 @@ def render():
             _start_timer(subject['id'], duration, topic)
 
     else:
-        # Timer running
-        start_time = st.session_state.timer_start_time
-        duration = st.session_state.timer_duration
-        elapsed = (datetime.now() - start_time).total_seconds() / 60
-        remaining = max(0, duration - elapsed)
-
-        # Get subject name
-        subject = db.get_subject_by_id(st.session_state.timer_subject_id)
-        subject_name = subject['name'] if subject else "Unknown"
-        current_topic = st.session_state.get('timer_topic')
-
-        if current_topic:
-            st.markdown(f"### Studying: **{subject_name}** - {current_topic}")
-        else:
-            st.markdown(f"### Studying: **{subject_name}**")
-
-        # Timer display
-        mins = int(remaining)
-        secs = int((remaining - mins) * 60)
-
-        st.markdown(f"""
-        <div class="timer-display">
-            {mins:02d}:{secs:02d}
-        </div>
-        """, unsafe_allow_html=True)
-
-        progress = elapsed / duration if duration > 0 else 0
-        st.progress(min(progress, 1.0))
-
-        if remaining <= 0:
-            st.success("🎉 Session Complete!")
-            if current_topic:
-                st.info(f"Your mastery of '{current_topic}' has been updated!")
-            st.balloons()
-
-            # Log the session with topic
-            db.add_focus_session(
-                subject_id=st.session_state.timer_subject_id,
-                duration_minutes=duration,
-                completed=True,
-                topic=current_topic
-            )
-
-            if st.button("Start Another Session", type="primary"):
-                st.session_state.timer_running = False
-                st.session_state.timer_topic = None
-                st.rerun()
-        else:
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("⏸️ Pause & Save", use_container_width=True):
-                    # Save partial session (not completed, so no mastery update)
-                    db.add_focus_session(
-                        subject_id=st.session_state.timer_subject_id,
-                        duration_minutes=int(elapsed),
-                        completed=False,
-                        topic=current_topic
-                    )
-                    st.session_state.timer_running = False
-                    st.session_state.timer_topic = None
-                    st.success(f"Saved {int(elapsed)} minutes!")
-                    st.rerun()
-            with col2:
-                if st.button("❌ Cancel", use_container_width=True):
-                    st.session_state.timer_running = False
-                    st.session_state.timer_topic = None
-                    st.rerun()
-
-            # Auto-refresh
-            st.markdown("*Timer updates every few seconds. Refresh page to update.*")
+        subject = next((s for s in subjects if s['id'] == st.session_state.timer_subject_id), None)
+        _render_running_timer(subject['name'] if subject else "Unknown")
 
     # Recent sessions
     st.markdown("---")
@@ -180,23 +133,93 @@ def render():
 
     recent = db.get_recent_focus_sessions(limit=10)
     if recent:
-        for session in recent:
-            status = "✅" if session.get('completed') else "⏸️"
-            topic_text = f" • {session['topic']}" if session.get('topic') else ""
-            st.markdown(f"""
-            <div style="background: #f8f9fa; padding: 10px; margin: 5px 0; border-radius: 8px;">
-                {status} <strong>{session['subject_name']}</strong>{topic_text} - {session['duration_minutes']} min
-                <span style="color: #666; font-size: 12px; float: right;">{session['created_at'][:10]}</span>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(_recent_sessions_template().render(rows=recent), unsafe_allow_html=True)
     else:
         st.info("No recent sessions. Start your first focus session!")
 
 
+@st.fragment(run_every=1)
+def _render_running_timer(subject_name: str):
+    """Render the live countdown.
+
+    Runs as a fragment that refreshes itself every second, so the countdown
+    ticks without rerunning the stat cards and recent sessions above/below.
+    """
+    duration = st.session_state.timer_duration
+    elapsed = (time.monotonic() - st.session_state.timer_start_mono) / 60
+    remaining = max(0, duration - elapsed)
+    current_topic = st.session_state.get('timer_topic')
+
+    if remaining <= 0:
+        # Log the session with topic once, then show completion on a full rerun
+        db.add_focus_session(
+            subject_id=st.session_state.timer_subject_id,
+            duration_minutes=duration,
+            completed=True,
+            topic=current_topic
+        )
+        st.session_state.timer_running = False
+        st.session_state.timer_completed = True
+        st.rerun()
+
+    if current_topic:
+        st.markdown(f"### Studying: **{subject_name}** - {current_topic}")
+    else:
+        st.markdown(f"### Studying: **{subject_name}**")
+
+    # Timer display
+    mins = int(remaining)
+    secs = int((remaining - mins) * 60)
+
+    st.markdown(f"""
+    <div class="timer-display">
+        {mins:02d}:{secs:02d}
+    </div>
+    """, unsafe_allow_html=True)
+
+    progress = elapsed / duration if duration > 0 else 0
+    st.progress(min(progress, 1.0))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("⏸️ Pause & Save", use_container_width=True):
+            # Save partial session (not completed, so no mastery update)
+            db.add_focus_session(
+                subject_id=st.session_state.timer_subject_id,
+                duration_minutes=int(elapsed),
+                completed=False,
+                topic=current_topic
+            )
+            st.session_state.timer_running = False
+            st.session_state.timer_topic = None
+            st.success(f"Saved {int(elapsed)} minutes!")
+            st.rerun()
+    with col2:
+        if st.button("❌ Cancel", use_container_width=True):
+            st.session_state.timer_running = False
+            st.session_state.timer_topic = None
+            st.rerun()
+
+
+def _render_session_complete():
+    """Show the completion message for the session that just finished."""
+    st.success("🎉 Session Complete!")
+    current_topic = st.session_state.get('timer_topic')
+    if current_topic:
+        st.info(f"Your mastery of '{current_topic}' has been updated!")
+    st.balloons()
+
+    if st.button("Start Another Session", type="primary"):
+        st.session_state.timer_completed = False
+        st.session_state.timer_topic = None
+        st.rerun()
+
+
 def _start_timer(subject_id: int, duration: int, topic: str = None):
     """Start a new timer session."""
     st.session_state.timer_running = True
-    st.session_state.timer_start_time = datetime.now()
+    # Monotonic float: cheap to subtract on every tick and immune to clock changes
+    st.session_state.timer_start_mono = time.monotonic()
     st.session_state.timer_duration = duration
     st.session_state.timer_subject_id = subject_id
     st.session_state.timer_topic = topic if topic else None
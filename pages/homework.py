@@ -4,17 +4,47 @@ Homework tracking and management.
 """
 
 import streamlit as st
+import pandas as pd
 from datetime import date
 import database as db
 from utils import format_due_date, days_until
 
+HOMEWORK_PER_PAGE = 25
+COMPLETED_SHOWN = 20
+
+
+# Cached reads: `version` is db.data_version(), so any write (from this page or
+# any other) moves reruns onto a fresh cache entry.
+@st.cache_data(ttl="60s", max_entries=32)
+def _cached_subjects(version: int) -> list:
+    return db.get_all_subjects()
+
+
+@st.cache_data(ttl="60s", max_entries=32)
+def _cached_homework(version: int, subject_id: int = None, priority: str = None,
+                     page: int = 1) -> list:
+    return db.get_homework(subject_id=subject_id, priority=priority,
+                           limit=HOMEWORK_PER_PAGE, offset=(page - 1) * HOMEWORK_PER_PAGE)
+
+
+@st.cache_data(ttl="60s", max_entries=32)
+def _cached_homework_count(version: int, subject_id: int = None, priority: str = None,
+                           completed: bool = False) -> int:
+    return db.get_homework_count(subject_id=subject_id, priority=priority, completed=completed)
+
+
+@st.cache_data(ttl="60s", max_entries=32)
+def _cached_completed(version: int) -> list:
+    return db.get_completed_homework(limit=COMPLETED_SHOWN)
+
 
 def render():
     """Render the Homework tracking page."""
     st.title("📝 Homework Tracker")
     st.markdown("Track your homework assignments and never miss a deadline.")
 
-    subjects = db.get_all_subjects()
+    version = db.data_version()
+    subjects = _cached_subjects(version)
     if not subjects:
         st.warning("Add your subjects first in **Subjects** (under Settings) to start tracking homework.")
         st.stop()
@@ -23,57 +53,76 @@ def render():
 
     # TAB 1: All Homework
     with tab1:
-        homework = db.get_all_homework()
-        if homework:
-            # Filter options
-            col1, col2 = st.columns(2)
-            with col1:
-                filter_subject = st.selectbox(
-                    "Filter by subject:",
-                    options=[None] + subjects,
-                    format_func=lambda x: "All Subjects" if x is None else x['name']
-                )
-            with col2:
-                filter_priority = st.selectbox(
-                    "Filter by priority:",
-                    options=[None, "high", "medium", "low"],
-                    format_func=lambda x: "All Priorities" if x is None else x.title()
-                )
-
-            # Apply filters
-            filtered = homework
-            if filter_subject:
-                filtered = [h for h in filtered if h['subject_id'] == filter_subject['id']]
-            if filter_priority:
-                filtered = [h for h in filtered if h['priority'] == filter_priority]
+        # Filter options
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            filter_subject = st.selectbox(
+                "Filter by subject:",
+                options=[None] + subjects,
+                format_func=lambda x: "All Subjects" if x is None else x['name']
+            )
+        with col2:
+            filter_priority = st.selectbox(
+                "Filter by priority:",
+                options=[None, "high", "medium", "low"],
+                format_func=lambda x: "All Priorities" if x is None else x.title()
+            )
+
+        # Filters and paging are applied in SQL
+        subject_id = filter_subject['id'] if filter_subject else None
+        total = _cached_homework_count(version, subject_id=subject_id, priority=filter_priority)
+        page_count = max(1, -(-total // HOMEWORK_PER_PAGE))
+        with col3:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1)
 
+        filtered = _cached_homework(version, subject_id=subject_id,
+                                    priority=filter_priority, page=page)
+        if filtered:
+            if page_count > 1:
+                st.caption(f"{total} items (page {page} of {page_count})")
             st.markdown("---")
 
+            # Annotate all rows up front against a single `today`
+            today = date.today()
+            priority_icons = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}
+            rows = []
             for hw in filtered:
-                days = days_until(hw['due_date'])
-                is_overdue = days < 0
+                is_overdue = days_until(hw['due_date'], today) < 0
+                rows.append({
+                    "done": False,
+                    "title": f"⚠️ {hw['title']}" if is_overdue else hw['title'],
+                    "subject": hw['subject_name'],
+                    "topic": hw.get('topic') or "",
+                    "due": format_due_date(hw['due_date'], today).replace("**", ""),
+                    "priority": priority_icons.get(hw['priority'], '⚪'),
+                    "description": hw['description'] or ""
+                })
 
-                col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
-                with col1:
-                    if is_overdue:
-                        st.markdown(f"**⚠️ {hw['title']}**")
-                    else:
-                        st.markdown(f"**{hw['title']}**")
-                    topic_text = f" • {hw['topic']}" if hw.get('topic') else ""
-                    st.caption(f"{hw['subject_name']}{topic_text}")
-                with col2:
-                    st.markdown(format_due_date(hw['due_date']))
-                with col3:
-                    priority_colors = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}
-                    st.markdown(priority_colors.get(hw['priority'], '⚪'))
-                with col4:
-                    if st.button("✓", key=f"complete_{hw['id']}"):
-                        db.mark_homework_complete(hw['id'])
-                        st.rerun()
+            # One editable grid instead of a row of columns and a button per item
+            edited = st.data_editor(
+                pd.DataFrame(rows),
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "done": st.column_config.CheckboxColumn("✓", width="small"),
+                    "title": "Title",
+                    "subject": "Subject",
+                    "topic": "Topic",
+                    "due": "Due",
+                    "priority": st.column_config.TextColumn("Priority", width="small"),
+                    "description": "Description"
+                },
+                disabled=["title", "subject", "topic", "due", "priority", "description"],
+                key=f"homework_editor_{subject_id}_{filter_priority}_{page}"
+            )
 
-                if hw['description']:
-                    st.caption(hw['description'])
-                st.markdown("---")
+            ticked = [hw['id'] for hw, done in zip(filtered, edited["done"]) if done]
+            if st.button(f"✓ Mark Complete ({len(ticked)})", type="primary",
+                         disabled=not ticked, key="complete_ticked_homework"):
+                db.mark_homework_complete_bulk(ticked)
+                st.rerun()
+        elif filter_subject or filter_priority:
+            st.info("No homework matches these filters.")
         else:
             st.info("No homework to show! Add some using the 'Add New' tab.")
 
@@ -114,10 +163,11 @@ def render():
 
     # TAB 3: Completed
     with tab3:
-        completed = db.get_completed_homework()
+        completed = _cached_completed(version)
         if completed:
-            st.markdown(f"### Completed ({len(completed)} items)")
-            for hw in completed[:20]:
+            completed_total = _cached_homework_count(version, completed=True)
+            st.markdown(f"### Completed ({completed_total} items)")
+            for hw in completed:
                 col1, col2 = st.columns([4, 1])
                 with col1:
                     st.markdown(f"~~{hw['title']}~~")
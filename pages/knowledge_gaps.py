@@ -5,9 +5,111 @@ Identify knowledge gaps and track mastery over time.
 
 import streamlit as st
 import database as db
+import pandas as pd
+import hashlib
 import json
+import random
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from functools import lru_cache
+from itertools import cycle, islice
+
+# Concurrent Claude requests when generating an assessment's questions
+QUESTION_WORKERS = 5
+
+# Cached questions a topic needs before new assessments stop generating more
+QUESTION_POOL_SIZE = 5
+
+# Static instructions are sent as cached system prompts; only the short
+# per-call details go in the user message.
+QUESTION_GENERATOR_SYSTEM = """You are an exam question generator for GCSE students. Generate clear, accurate questions.
+
+Respond ONLY with valid JSON in this exact format, no other text:
+{
+    "question_text": "Your question here?",
+    "question_type": "multiple_choice",
+    "options": ["A) First option", "B) Second option", "C) Third option", "D) Fourth option"],
+    "correct_answer": "A) First option",
+    "difficulty": "medium",
+    "marks": 1
+}
+
+For question_type, use one of: "multiple_choice", "short_answer", "true_false"
+For true_false, options should be ["True", "False"]
+For short_answer, options should be null
+
+Make the question test understanding, not just memorization."""
+
+QUESTION_BATCH_SYSTEM = """You are an exam question generator for GCSE students. Generate clear, accurate questions.
+
+You will be given a subject and a JSON list of topics. Write one question per topic, in the same order.
+Respond ONLY with a valid JSON array, no other text, where each item has this format:
+{
+    "topic": "The topic from the list",
+    "question_text": "Your question here?",
+    "question_type": "multiple_choice",
+    "options": ["A) First option", "B) Second option", "C) Third option", "D) Fourth option"],
+    "correct_answer": "A) First option",
+    "difficulty": "medium",
+    "marks": 1
+}
+
+For question_type, use one of: "multiple_choice", "short_answer", "true_false"
+For true_false, options should be ["True", "False"]
+For short_answer, options should be null
+Vary the question types, and don't repeat a question when a topic appears more than once.
+
+Make the questions test understanding, not just memorization."""
+
+SHORT_ANSWER_MARKER_SYSTEM = """You are a fair exam marker for GCSE students.
+
+You will be given a question, the correct answer and a student's answer.
+Respond ONLY with valid JSON, no other text:
+{
+    "is_correct": true or false,
+    "explanation": "Brief explanation (1-2 sentences)"
+}
+
+Be fair - award marks for substantially correct answers even if wording differs slightly."""
+
+ASSESSMENT_FEEDBACK_SYSTEM = """You are an encouraging study coach for GCSE students. Be supportive but specific.
+
+You will be given a student's assessment result. Provide brief, encouraging feedback (3-4 sentences) that:
+1. Acknowledges their effort
+2. Highlights strengths
+3. Suggests 1-2 specific areas to focus on
+4. Ends with encouragement"""
+
+GAP_ANALYSIS_SYSTEM = """You are an expert study advisor helping a GCSE student prepare for exams. Be specific and actionable.
+
+Based on the knowledge gap analysis you are given, provide a focused analysis with:
+1. **Priority Focus Areas** - Top 3 gaps to address first (explain why)
+2. **Study Recommendations** - Specific actions for each priority area
+3. **Leverage Your Strengths** - How to use what you know well
+4. **Exam Readiness** - Brief assessment of preparation level
+5. **Quick Win** - One easy improvement to make today
+
+Keep it practical and encouraging. Use bullet points."""
+
+
+@st.cache_data(ttl="10m")
+def _cached_assessment(assessment_id):
+    """Assessment header for the active assessment panel."""
+    return db.get_assessment_by_id(assessment_id)
+
+
+@st.cache_data(ttl="5m", max_entries=32)
+def _topics_for(subject_id, version):
+    """Assessable topics for a subject. `version` is db.data_version()."""
+    return db.get_available_topics_for_subject(subject_id)
+
+
+@st.cache_data(ttl="5m", max_entries=32)
+def _recent_assessments(subject_id, version):
+    """Last five assessments for a subject. `version` is db.data_version()."""
+    return db.get_assessments_by_subject(subject_id, limit=5)
 
 
 def render():
@@ -99,7 +201,7 @@ def _render_assessment_tab(subjects, api_key):
     with col2:
         selected_topics = []
         if assessment_type[0] == "topic_focused":
-            topics = db.get_available_topics_for_subject(subject['id'])
+            topics = _topics_for(subject['id'], db.data_version())
             if topics:
                 selected_topics = st.multiselect(
                     "Select Topics",
@@ -133,6 +235,7 @@ def _render_assessment_tab(subjects, api_key):
             )
             if assessment_id:
                 st.session_state.current_assessment = assessment_id
+                st.session_state.assessment_questions = _load_assessment_questions(assessment_id)
                 st.session_state.assessment_index = 0
                 st.session_state.assessment_start_time = time.time()
                 st.rerun()
@@ -143,7 +246,7 @@ def _render_assessment_tab(subjects, api_key):
     st.markdown("---")
     st.markdown("### Recent Assessments")
 
-    recent = db.get_assessments_by_subject(subject['id'], limit=5)
+    recent = _recent_assessments(subject['id'], db.data_version())
     if recent:
         for assessment in recent:
             status_icon = "✅" if assessment['status'] == 'completed' else "⏳"
@@ -160,18 +263,28 @@ def _render_assessment_tab(subjects, api_key):
         st.info("No assessments yet. Start one above!")
 
 
+@st.fragment
 def _render_active_assessment(api_key):
-    """Render an in-progress assessment."""
+    """Render an in-progress assessment.
+
+    Runs as a fragment, so answering, skipping and moving the confidence
+    slider only rerun this panel instead of the whole page.
+    """
 
     assessment_id = st.session_state.current_assessment
-    assessment = db.get_assessment_by_id(assessment_id)
+    assessment = _cached_assessment(assessment_id)
 
     if not assessment:
         st.session_state.current_assessment = None
+        st.session_state.assessment_questions = None
         st.rerun()
         return
 
-    questions = db.get_assessment_questions(assessment_id)
+    # Questions are fixed once generated, so keep them for the whole session
+    questions = st.session_state.get('assessment_questions')
+    if questions is None:
+        questions = _load_assessment_questions(assessment_id)
+        st.session_state.assessment_questions = questions
     current_idx = st.session_state.get('assessment_index', 0)
 
     # Check if assessment is complete
@@ -204,64 +317,81 @@ def _render_active_assessment(api_key):
     </div>
     """, unsafe_allow_html=True)
 
-    # Answer input based on question type
-    answer = None
-
-    if question['question_type'] == 'multiple_choice':
-        options = json.loads(question['options']) if question['options'] else []
-        if options:
+    # Answer input based on question type. The form batches the answer and
+    # confidence widgets so changing them doesn't rerun until a button is pressed.
+    with st.form(f"answer_form_{question['id']}", clear_on_submit=True, border=False):
+        answer = None
+
+        if question['question_type'] == 'multiple_choice':
+            options = question['_options']
+            if options:
+                answer = st.radio(
+                    "Select your answer:",
+                    options,
+                    key=f"answer_{question['id']}"
+                )
+        elif question['question_type'] == 'true_false':
             answer = st.radio(
-                "Select your answer:",
-                options,
+                "True or False?",
+                ["True", "False"],
                 key=f"answer_{question['id']}"
             )
-    elif question['question_type'] == 'true_false':
-        answer = st.radio(
-            "True or False?",
-            ["True", "False"],
-            key=f"answer_{question['id']}"
-        )
-    else:  # short_answer
-        answer = st.text_area(
-            "Your answer:",
-            key=f"answer_{question['id']}",
-            height=100
-        )
-
-    # Confidence slider
-    confidence = st.slider(
-        "How confident are you?",
-        min_value=1,
-        max_value=5,
-        value=3,
-        key=f"confidence_{question['id']}",
-        help="1 = Guessing, 5 = Very confident"
-    )
+        else:  # short_answer
+            answer = st.text_area(
+                "Your answer:",
+                key=f"answer_{question['id']}",
+                height=100
+            )
 
-    # Action buttons
-    col1, col2, col3 = st.columns([2, 1, 1])
+        # Confidence slider
+        confidence = st.slider(
+            "How confident are you?",
+            min_value=1,
+            max_value=5,
+            value=3,
+            key=f"confidence_{question['id']}",
+            help="1 = Guessing, 5 = Very confident"
+        )
 
-    with col1:
-        if st.button("✓ Submit Answer", type="primary", disabled=not answer):
+        # Action buttons
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            submitted = st.form_submit_button("✓ Submit Answer", type="primary")
+        with col2:
+            skipped = st.form_submit_button("⏭ Skip")
+        with col3:
+            exited = st.form_submit_button("🚪 Exit")
+
+    if submitted:
+        if answer:
             _submit_answer(assessment_id, question, answer, confidence, api_key)
             st.session_state.assessment_index = current_idx + 1
+            st.rerun(scope="fragment")
+        else:
+            st.warning("Enter an answer before submitting, or skip this question.")
+
+    if skipped:
+        st.session_state.assessment_index = current_idx + 1
+        st.rerun(scope="fragment")
+
+    if exited:
+        if st.session_state.get('confirm_exit'):
+            st.session_state.current_assessment = None
+            st.session_state.assessment_questions = None
+            st.session_state.assessment_index = 0
+            st.session_state.confirm_exit = False
             st.rerun()
+        else:
+            st.session_state.confirm_exit = True
+            st.warning("Click Exit again to confirm")
 
-    with col2:
-        if st.button("⏭ Skip"):
-            st.session_state.assessment_index = current_idx + 1
-            st.rerun()
 
-    with col3:
-        if st.button("🚪 Exit"):
-            if st.session_state.get('confirm_exit'):
-                st.session_state.current_assessment = None
-                st.session_state.assessment_index = 0
-                st.session_state.confirm_exit = False
-                st.rerun()
-            else:
-                st.session_state.confirm_exit = True
-                st.warning("Click Exit again to confirm")
+def _load_assessment_questions(assessment_id):
+    """Load an assessment's questions with their options decoded once into `_options`."""
+    questions = db.get_assessment_questions(assessment_id)
+    for q in questions:
+        q['_options'] = json.loads(q['options']) if q['options'] else []
+    return questions
 
 
 def _render_gap_analysis_tab(subjects, api_key):
@@ -287,8 +417,11 @@ def _render_gap_analysis_tab(subjects, api_key):
             st.success("Exam requirements synced!")
             st.rerun()
 
-    # Coverage overview
-    coverage = db.get_coverage_stats(subject_id)
+    # Coverage overview, gaps and strengths in one DB round-trip
+    dashboard = db.get_gap_dashboard(subject_id)
+    coverage = dashboard['coverage']
+    gaps = dashboard['gaps']
+    strengths = dashboard['strengths']
 
     st.markdown("---")
     st.markdown("#### Coverage Overview")
@@ -312,12 +445,11 @@ def _render_gap_analysis_tab(subjects, api_key):
 
     with col1:
         st.markdown("#### 🔴 Knowledge Gaps")
-        gaps = db.get_knowledge_gaps(subject_id)
         if gaps:
-            for gap in gaps[:10]:
-                urgency_color = _get_gap_urgency_color(gap)
-                st.markdown(f"""
-                <div style="border-left: 4px solid {urgency_color}; padding: 10px; margin: 5px 0; background: #fafafa; border-radius: 0 8px 8px 0;">
+            # One markdown element for the whole list instead of one per gap
+            gaps_html = "".join(
+                f"""
+                <div style="border-left: 4px solid {_get_gap_urgency_color(gap)}; padding: 10px; margin: 5px 0; background: #fafafa; border-radius: 0 8px 8px 0;">
                     <strong>{gap['topic']}</strong><br>
                     <small style="color: #666;">
                         Exam frequency: {gap['frequency']}x |
@@ -325,16 +457,18 @@ def _render_gap_analysis_tab(subjects, api_key):
                         Importance: {gap['importance_level'].title()}
                     </small>
                 </div>
-                """, unsafe_allow_html=True)
+                """
+                for gap in gaps[:10]
+            )
+            st.markdown(gaps_html, unsafe_allow_html=True)
         else:
             st.success("No significant gaps identified!")
 
     with col2:
         st.markdown("#### 🟢 Strengths")
-        strengths = db.get_strong_topics(subject_id)
         if strengths:
-            for strength in strengths[:10]:
-                st.markdown(f"""
+            strengths_html = "".join(
+                f"""
                 <div style="border-left: 4px solid #27ae60; padding: 10px; margin: 5px 0; background: #f0fff4; border-radius: 0 8px 8px 0;">
                     <strong>{strength['topic']}</strong><br>
                     <small style="color: #666;">
@@ -342,7 +476,10 @@ def _render_gap_analysis_tab(subjects, api_key):
                         Attempts: {strength['total_attempts']}
                     </small>
                 </div>
-                """, unsafe_allow_html=True)
+                """
+                for strength in strengths[:10]
+            )
+            st.markdown(strengths_html, unsafe_allow_html=True)
         else:
             st.info("Complete some assessments to identify strengths.")
 
@@ -382,7 +519,7 @@ def _render_gap_analysis_tab(subjects, api_key):
         st.warning("Set your Claude API key in Settings to enable AI analysis.")
     elif st.button("Generate AI Analysis", type="primary"):
         with st.spinner("Analyzing your knowledge gaps..."):
-            analysis = _generate_ai_gap_analysis(subject_id, api_key)
+            analysis = _generate_ai_gap_analysis(subject_id, dashboard, api_key)
             if analysis:
                 st.markdown(analysis)
             else:
@@ -415,8 +552,9 @@ def _render_progress_report_tab(subjects):
         days_map = {"Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90, "All time": 365}
         days = days_map[time_period]
 
-    # Overview stats
-    stats = db.get_assessment_stats(subject_id, days)
+    # All report sections in one DB round-trip
+    dashboard = db.get_progress_dashboard(subject_id, days)
+    stats = dashboard['stats']
 
     st.markdown("---")
     st.markdown("#### Overview")
@@ -435,19 +573,13 @@ def _render_progress_report_tab(subjects):
 
     # Progress over time
     st.markdown("#### Score Progress")
-    progress_data = db.get_assessment_progress_over_time(subject_id, limit=20)
+    progress_data = dashboard['progress']
 
     if progress_data:
-        # Reverse for chronological order
-        progress_data = list(reversed(progress_data))
-
-        # Simple text-based chart
-        for entry in progress_data[-10:]:
-            score = entry['score_percentage'] or 0
-            bar_length = int(score / 5)  # Scale to 20 chars max
-            bar = "█" * bar_length + "░" * (20 - bar_length)
-            date_str = entry['started_at'][:10] if entry['started_at'] else "Unknown"
-            st.text(f"{date_str} | {bar} {score:.0f}%")
+        # Last 10 assessments, averaged per day so same-day bars don't stack
+        df = pd.DataFrame(progress_data, columns=['started_date', 'score_percentage'])
+        daily = df.fillna({'score_percentage': 0}).groupby('started_date')['score_percentage'].mean()
+        st.bar_chart(daily, use_container_width=True)
     else:
         st.info("Complete some assessments to see progress.")
 
@@ -455,24 +587,24 @@ def _render_progress_report_tab(subjects):
 
     # Topic mastery breakdown
     st.markdown("#### Topic Mastery Levels")
-    mastery_data = db.get_topic_mastery(subject_id)
+    mastery_data = dashboard['mastery']
 
     if mastery_data:
-        for topic_data in mastery_data[:15]:
-            col1, col2, col3 = st.columns([3, 1, 1])
-
-            with col1:
-                st.markdown(f"**{topic_data['topic']}**")
-                mastery_pct = topic_data['mastery_level']
-                st.progress(mastery_pct / 100)
-
-            with col2:
-                color = "#27ae60" if mastery_pct >= 70 else ("#f39c12" if mastery_pct >= 40 else "#e74c3c")
-                st.markdown(f"<span style='color:{color}'>{mastery_pct:.0f}%</span>", unsafe_allow_html=True)
-
-            with col3:
-                trend_icons = {"improving": "📈", "declining": "📉", "stable": "➡️"}
-                st.markdown(f"{trend_icons.get(topic_data['trend'], '➡️')} {topic_data['trend'].title()}")
+        trend_icons = {"improving": "📈", "declining": "📉", "stable": "➡️"}
+        df = pd.DataFrame(mastery_data[:15], columns=['topic', 'mastery_level', 'trend'])
+        df['trend'] = [f"{trend_icons.get(t, '➡️')} {(t or 'stable').title()}" for t in df['trend']]
+        st.dataframe(
+            df,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "topic": "Topic",
+                "mastery_level": st.column_config.ProgressColumn(
+                    "Mastery", format="%.0f%%", min_value=0, max_value=100
+                ),
+                "trend": "Trend"
+            }
+        )
     else:
         st.info("Complete some assessments to see mastery levels.")
 
@@ -480,7 +612,7 @@ def _render_progress_report_tab(subjects):
 
     # Performance by question type
     st.markdown("#### Performance by Question Type")
-    type_performance = db.get_performance_by_question_type(subject_id)
+    type_performance = dashboard['type_performance']
 
     if type_performance:
         for perf in type_performance:
@@ -531,80 +663,131 @@ def _create_and_populate_assessment(subject_id, assessment_type, question_source
         if not topics:
             topics = [subject_name]  # Use subject name as fallback topic
 
-    # Generate questions using AI
-    questions_generated = 0
-    if topics and len(topics) > 0:
-        topics_cycle = topics * ((num_questions // len(topics)) + 1)
-    else:
-        topics_cycle = [subject_name] * num_questions
-
-    for i in range(num_questions):
-        topic = topics_cycle[i] if i < len(topics_cycle) else subject_name
-
-        question = _generate_question_for_topic(topic, subject_name, api_key)
-
-        if question:
-            db.add_assessment_question(
-                assessment_id=assessment_id,
-                question_text=question['question_text'],
-                question_type=question['question_type'],
-                correct_answer=question['correct_answer'],
-                topic=topic,
-                options=json.dumps(question.get('options')) if question.get('options') else None,
-                difficulty=question.get('difficulty', 'medium'),
-                source_type='ai_generated',
-                marks=question.get('marks', 1)
-            )
-            questions_generated += 1
-
-    if questions_generated == 0:
+    # Generate questions using AI, cycling through the topics
+    question_topics = list(islice(cycle(topics or [subject_name]), num_questions))
+
+    # Quick checks favour speed; longer assessments get the stronger model
+    model = 'haiku' if assessment_type == 'quick' else 'sonnet'
+
+    # Reuse cached questions for topics that already have a full pool
+    pool = {}
+    for row in db.get_cached_questions(subject_name, set(question_topics)):
+        pool.setdefault(row['topic'], []).append(row)
+
+    generated = [None] * num_questions
+    used = set()
+    for i, topic in enumerate(question_topics):
+        cached = pool.get(topic, [])
+        candidates = [row for row in cached if row['question_text'] not in used]
+        if len(cached) >= QUESTION_POOL_SIZE and candidates:
+            row = random.choice(candidates)
+            generated[i] = json.loads(row['payload'])
+            used.add(row['question_text'])
+
+    # Ask for the rest in one call; anything missing from the reply is
+    # generated per topic, concurrently
+    to_generate = [i for i, question in enumerate(generated) if not question]
+    if to_generate:
+        batch = _generate_questions_batch([question_topics[i] for i in to_generate],
+                                          subject_name, api_key, model)
+        for i, question in zip(to_generate, batch):
+            generated[i] = question
+
+        missing = [i for i in to_generate if not generated[i]]
+        if missing:
+            with ThreadPoolExecutor(max_workers=QUESTION_WORKERS) as executor:
+                retried = executor.map(
+                    lambda i: _generate_question_for_topic(question_topics[i], subject_name,
+                                                           api_key, model),
+                    missing
+                )
+                for i, question in zip(missing, retried):
+                    generated[i] = question
+
+        db.add_cached_questions(subject_name, [
+            (question_topics[i], generated[i]['question_text'], json.dumps(generated[i]))
+            for i in to_generate if generated[i]
+        ])
+
+    rows = [
+        {
+            'question_text': question['question_text'],
+            'question_type': question['question_type'],
+            'correct_answer': question['correct_answer'],
+            'topic': topic,
+            'options': json.dumps(question.get('options')) if question.get('options') else None,
+            'difficulty': question.get('difficulty', 'medium'),
+            'source_type': 'ai_generated',
+            'marks': question.get('marks', 1)
+        }
+        for topic, question in zip(question_topics, generated)
+        if question
+    ]
+
+    if not rows:
         return None
 
+    db.add_assessment_questions_bulk(assessment_id, rows)
+
     return assessment_id
 
 
-def _generate_question_for_topic(topic, subject_name, api_key):
+def _generate_question_for_topic(topic, subject_name, api_key, model=None):
     """Generate a single question for a topic using Claude AI."""
     try:
-        from utils import call_claude
+        from utils import call_claude, extract_json
 
-        prompt = f"""Generate a single GCSE-level question about "{topic}" for {subject_name}.
+        prompt = f'Generate a single GCSE-level question about "{topic}" for {subject_name}.'
 
-Respond ONLY with valid JSON in this exact format:
-{{
-    "question_text": "Your question here?",
-    "question_type": "multiple_choice",
-    "options": ["A) First option", "B) Second option", "C) Third option", "D) Fourth option"],
-    "correct_answer": "A) First option",
-    "difficulty": "medium",
-    "marks": 1
-}}
+        result = call_claude(
+            api_key=api_key,
+            prompt=prompt,
+            system=QUESTION_GENERATOR_SYSTEM,
+            model=model,
+            cache_system=True
+        )
 
-For question_type, use one of: "multiple_choice", "short_answer", "true_false"
-For true_false, options should be ["True", "False"]
-For short_answer, options should be null
+        if result and not result.startswith("Error:"):
+            question = extract_json(result)
+            if isinstance(question, dict):
+                return question
 
-Make the question test understanding, not just memorization."""
+    except Exception:
+        pass  # Other errors (API, network, etc.)
+
+    return None
+
+
+def _generate_questions_batch(topics, subject_name, api_key, model=None):
+    """Generate one question per topic in a single Claude call.
+
+    Returns a list the same length as `topics`, with None for any question
+    that is missing or malformed in the response.
+    """
+    questions = [None] * len(topics)
+    try:
+        from utils import call_claude, extract_json
 
         result = call_claude(
             api_key=api_key,
-            prompt=prompt,
-            system="You are an exam question generator for GCSE students. Generate clear, accurate questions. Respond ONLY with valid JSON, no other text."
+            prompt=f"Subject: {subject_name}\nTopics: {json.dumps(topics)}",
+            system=QUESTION_BATCH_SYSTEM,
+            model=model,
+            cache_system=True,
+            max_tokens=300 * len(topics)
         )
 
         if result and not result.startswith("Error:"):
-            # Parse JSON from response
-            start = result.find('{')
-            end = result.rfind('}') + 1
-            if start >= 0 and end > start:
-                return json.loads(result[start:end])
-
-    except json.JSONDecodeError:
-        pass  # Invalid JSON from AI response
+            parsed = extract_json(result, '[') or []
+            for i, question in enumerate(parsed[:len(topics)]):
+                if isinstance(question, dict) and question.get('question_text') \
+                        and question.get('question_type') and question.get('correct_answer'):
+                    questions[i] = question
+
     except Exception:
         pass  # Other errors (API, network, etc.)
 
-    return None
+    return questions
 
 
 def _submit_answer(assessment_id, question, student_answer, confidence, api_key):
@@ -638,8 +821,8 @@ def _submit_answer(assessment_id, question, student_answer, confidence, api_key)
         ai_evaluation=ai_evaluation
     )
 
-    # Get subject_id for mastery update
-    assessment = db.get_assessment_by_id(assessment_id)
+    # Get subject_id for mastery update (fixed for the assessment, so cached)
+    assessment = _cached_assessment(assessment_id)
     if assessment:
         db.update_topic_mastery(
             subject_id=assessment['subject_id'],
@@ -651,37 +834,25 @@ def _submit_answer(assessment_id, question, student_answer, confidence, api_key)
 def _evaluate_short_answer(question, correct_answer, student_answer, api_key):
     """Use AI to evaluate a short answer response."""
     try:
-        from utils import call_claude
-
-        prompt = f"""Evaluate this student's answer:
+        from utils import call_claude, extract_json
 
-Question: {question}
+        prompt = f"""Question: {question}
 Correct Answer: {correct_answer}
-Student Answer: {student_answer}
-
-Respond ONLY with valid JSON:
-{{
-    "is_correct": true or false,
-    "explanation": "Brief explanation (1-2 sentences)"
-}}
-
-Be fair - award marks for substantially correct answers even if wording differs slightly."""
+Student Answer: {student_answer}"""
 
         result = call_claude(
             api_key=api_key,
             prompt=prompt,
-            system="You are a fair exam marker. Respond ONLY with valid JSON."
+            system=SHORT_ANSWER_MARKER_SYSTEM,
+            model='haiku',  # Marking one answer is a simple judgement
+            cache_system=True
         )
 
         if result and not result.startswith("Error:"):
-            start = result.find('{')
-            end = result.rfind('}') + 1
-            if start >= 0 and end > start:
-                parsed = json.loads(result[start:end])
+            parsed = extract_json(result)
+            if isinstance(parsed, dict):
                 return parsed.get('is_correct', False), parsed.get('explanation', '')
 
-    except json.JSONDecodeError:
-        pass  # Invalid JSON from AI response
     except Exception:
         pass  # Other errors (API, network, etc.)
 
@@ -690,21 +861,20 @@ Be fair - award marks for substantially correct answers even if wording differs
 
 
 def _complete_assessment(assessment_id, api_key):
-    """Complete the assessment and show results."""
+    """Complete the assessment and show results.
+
+    The score and detailed results render first; AI feedback is generated
+    last and filled into its placeholder, so the slow API call doesn't hold
+    up the rest of the page.
+    """
 
     assessment = db.get_assessment_by_id(assessment_id)
     responses = db.get_assessment_responses(assessment_id)
-
-    # Generate AI feedback
-    ai_feedback = None
-    if api_key:
-        ai_feedback = _generate_assessment_feedback(assessment, responses, api_key)
-
-    # Mark complete
-    db.complete_assessment(assessment_id, ai_feedback)
+    already_completed = assessment['status'] == 'completed'
 
     # Show results
-    st.balloons()
+    if not already_completed:
+        st.balloons()
 
     score_pct = (assessment['correct_answers'] / assessment['total_questions'] * 100
                  if assessment['total_questions'] > 0 else 0)
@@ -719,10 +889,8 @@ def _complete_assessment(assessment_id, api_key):
     </div>
     """, unsafe_allow_html=True)
 
-    # Show AI feedback
-    if ai_feedback:
-        st.markdown("### AI Feedback")
-        st.markdown(ai_feedback)
+    # Filled in once feedback is available
+    feedback_placeholder = st.container()
 
     # Show detailed results
     with st.expander("View Detailed Results"):
@@ -739,38 +907,79 @@ def _complete_assessment(assessment_id, api_key):
     # Reset state
     if st.button("Start New Assessment", type="primary"):
         st.session_state.current_assessment = None
+        st.session_state.assessment_questions = None
         st.session_state.assessment_index = 0
         st.rerun()
 
+    # Generate AI feedback and mark complete (only once; later reruns reuse it)
+    if already_completed:
+        ai_feedback = assessment['ai_feedback']
+    else:
+        ai_feedback = None
+        if api_key:
+            with feedback_placeholder, st.spinner("Writing feedback..."):
+                ai_feedback = _generate_assessment_feedback(assessment, responses, api_key)
+        db.complete_assessment(assessment_id, ai_feedback)
+
+    # Show AI feedback
+    if ai_feedback:
+        with feedback_placeholder:
+            st.markdown("### AI Feedback")
+            st.markdown(ai_feedback)
+
+
+def _llm_cache_key(kind, inputs):
+    """Hash JSON-serialisable inputs into a db.get_cached_llm_response() key."""
+    payload = json.dumps([kind, inputs], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _topic_counts(counts):
+    """Format a topic Counter as 'Mitosis (3), Osmosis (2)', or 'None'."""
+    if not counts:
+        return 'None'
+    return ', '.join(f"{topic} ({n})" for topic, n in counts.most_common())
+
 
 def _generate_assessment_feedback(assessment, responses, api_key):
     """Generate AI feedback for completed assessment."""
+    if not responses:
+        return None
+
     try:
         from utils import call_claude
 
-        # Summarize performance
-        correct_topics = [r['topic'] for r in responses if r['is_correct']]
-        incorrect_topics = [r['topic'] for r in responses if not r['is_correct']]
+        # Summarize performance: each topic once, with how many questions it had
+        correct_topics = Counter(r['topic'] for r in responses if r['is_correct'])
+        incorrect_topics = Counter(r['topic'] for r in responses if not r['is_correct'])
+
+        # Same score on the same topics gives the same feedback, so key the
+        # cache on that rather than on the assessment id
+        cache_key = _llm_cache_key('assessment_feedback', {
+            'assessment': [assessment['assessment_type'], assessment['subject_name'],
+                           assessment['correct_answers'], assessment['total_questions']],
+            'responses': sorted([r['topic'], bool(r['is_correct'])] for r in responses)
+        })
+        cached = db.get_cached_llm_response(cache_key)
+        if cached:
+            return cached
 
         prompt = f"""A student just completed a {assessment['assessment_type']} assessment in {assessment['subject_name']}.
 
 Score: {assessment['correct_answers']}/{assessment['total_questions']}
-Topics answered correctly: {', '.join(correct_topics) if correct_topics else 'None'}
-Topics answered incorrectly: {', '.join(incorrect_topics) if incorrect_topics else 'None'}
-
-Provide brief, encouraging feedback (3-4 sentences) that:
-1. Acknowledges their effort
-2. Highlights strengths
-3. Suggests 1-2 specific areas to focus on
-4. Ends with encouragement"""
+Topics answered correctly: {_topic_counts(correct_topics)}
+Topics answered incorrectly: {_topic_counts(incorrect_topics)}"""
 
         result = call_claude(
             api_key=api_key,
             prompt=prompt,
-            system="You are an encouraging study coach for GCSE students. Be supportive but specific."
+            system=ASSESSMENT_FEEDBACK_SYSTEM,
+            model='sonnet',
+            cache_system=True
         )
 
         if result and not result.startswith("Error:"):
+            db.set_cached_llm_response(cache_key, result)
             return result
 
     except:
@@ -779,15 +988,19 @@ Provide brief, encouraging feedback (3-4 sentences) that:
     return None
 
 
-def _generate_ai_gap_analysis(subject_id, api_key):
-    """Generate AI-powered gap analysis."""
+def _generate_ai_gap_analysis(subject_id, dashboard, api_key):
+    """Generate AI-powered gap analysis.
+
+    `dashboard` is the db.get_gap_dashboard() result the tab already loaded,
+    so only the exam requirements are read here.
+    """
     try:
         from utils import call_claude
 
-        gaps = db.get_knowledge_gaps(subject_id)
-        strengths = db.get_strong_topics(subject_id)
+        gaps = dashboard['gaps']
+        strengths = dashboard['strengths']
+        coverage = dashboard['coverage']
         exam_reqs = db.get_exam_requirements(subject_id)
-        coverage = db.get_coverage_stats(subject_id)
 
         data_summary = f"""
 Coverage: {coverage['coverage_percentage']:.0f}% ({coverage['topics_mastered']} of {coverage['total_exam_topics']} topics mastered)
@@ -802,26 +1015,26 @@ Key Exam Topics:
 {json.dumps([{'topic': e['topic'], 'frequency': e['frequency'], 'importance': e['importance_level']} for e in exam_reqs[:10]], indent=2)}
 """
 
-        prompt = f"""Based on this knowledge gap analysis:
+        prompt = f"""Knowledge gap analysis:
 
-{data_summary}
+{data_summary}"""
 
-Provide a focused analysis with:
-1. **Priority Focus Areas** - Top 3 gaps to address first (explain why)
-2. **Study Recommendations** - Specific actions for each priority area
-3. **Leverage Your Strengths** - How to use what you know well
-4. **Exam Readiness** - Brief assessment of preparation level
-5. **Quick Win** - One easy improvement to make today
-
-Keep it practical and encouraging. Use bullet points."""
+        # The summary is built deterministically from the data, so it is the key
+        cache_key = _llm_cache_key('gap_analysis', prompt)
+        cached = db.get_cached_llm_response(cache_key)
+        if cached:
+            return cached
 
         result = call_claude(
             api_key=api_key,
             prompt=prompt,
-            system="You are an expert study advisor helping a GCSE student prepare for exams. Be specific and actionable."
+            system=GAP_ANALYSIS_SYSTEM,
+            model='sonnet',
+            cache_system=True
         )
 
         if result and not result.startswith("Error:"):
+            db.set_cached_llm_response(cache_key, result)
             return result
 
     except:
@@ -832,12 +1045,18 @@ Keep it practical and encouraging. Use bullet points."""
 
 def _get_gap_urgency_color(gap):
     """Get color based on gap urgency."""
-    importance = gap.get('importance_level', 'medium')
     mastery = gap.get('mastery_level', 0)
+    mastery_bucket = 0 if mastery < 30 else (1 if mastery < 50 else 2)
+    return _urgency_color(gap.get('importance_level', 'medium'), mastery_bucket,
+                          gap.get('frequency', 0) >= 3)
+
 
-    if importance == 'critical' or (mastery < 30 and gap.get('frequency', 0) >= 3):
+@lru_cache(maxsize=64)
+def _urgency_color(importance, mastery_bucket, frequent):
+    """Urgency colour for an importance level, mastery bucket (<30, <50, rest) and frequency flag."""
+    if importance == 'critical' or (mastery_bucket == 0 and frequent):
         return "#e74c3c"  # Red - urgent
-    elif importance == 'high' or mastery < 50:
+    elif importance == 'high' or mastery_bucket < 2:
         return "#f39c12"  # Orange - important
     else:
         return "#3498db"  # Blue - normal
@@ -5,13 +5,83 @@ Note storage and OCR import with image storage.
 
 import streamlit as st
 import database as db
+import pandas as pd
+import hashlib
+import json
 import os
+import shutil
 from pathlib import Path
 from datetime import datetime
 
+# Optional image/OCR dependencies, imported once rather than per click
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import ocr_utils  # needs numpy; OpenCV is optional inside it
+except ImportError:
+    ocr_utils = None
+
+try:
+    import vision_ocr
+except ImportError:
+    vision_ocr = None
+
 # Image storage path
 IMAGES_PATH = Path(__file__).parent.parent / "data" / "images" / "notes"
 
+NOTES_PER_PAGE = 50
+
+
+# Cached reads: `version` is db.data_version(), so adding, editing, starring or
+# deleting a note (or any other write) moves reruns onto a fresh cache entry.
+@st.cache_data(ttl=60, max_entries=32)
+def _cached_subjects(version):
+    return db.get_all_subjects()
+
+
+@st.cache_data(ttl=60, max_entries=32)
+def _cached_notes(version, subject_id=None, search=None, page=1):
+    return db.get_notes(subject_id=subject_id, search=search,
+                        limit=NOTES_PER_PAGE, offset=(page - 1) * NOTES_PER_PAGE)
+
+
+@st.cache_data(ttl=60, max_entries=32)
+def _cached_notes_count(version, subject_id=None, search=None):
+    return db.get_notes_count(subject_id=subject_id, search=search)
+
+
+@st.cache_data(ttl=60, max_entries=32)
+def _cached_favourites(version):
+    return db.get_favourite_notes(preview_only=True)
+
+
+def _extract_text_cached(uploaded_file, clean_up: bool) -> tuple:
+    """OCR an upload, reusing the stored result if this exact image was seen before.
+
+    The cache key is the hash of the uploaded bytes plus the clean-up
+    setting, so a repeat skips both preprocessing and the API call.
+    Returns (text, words, avg_confidence) like
+    vision_ocr.extract_text_with_confidence.
+    """
+    image_bytes = uploaded_file.getvalue()
+    image_hash = hashlib.sha256(image_bytes).hexdigest() + (":clean" if clean_up else "")
+    cached = db.get_cached_ocr(image_hash)
+    if cached:
+        return cached['text'], json.loads(cached['words'] or '[]'), cached['confidence']
+
+    if clean_up:
+        uploaded_file.seek(0)
+        with Image.open(uploaded_file) as image:
+            image_bytes = ocr_utils.prepare_for_ocr(image)
+
+    text, words, avg_confidence = vision_ocr.extract_text_with_confidence(image_bytes)
+    if text and text.strip():
+        db.add_cached_ocr(image_hash, text, json.dumps(words), avg_confidence)
+    return text, words, avg_confidence
+
 
 def save_uploaded_image(uploaded_file, note_id: int) -> dict:
     """Save an uploaded image to disk and return file info."""
@@ -24,23 +94,26 @@ def save_uploaded_image(uploaded_file, note_id: int) -> dict:
     filename = f"note_{note_id}_{timestamp}{ext}"
     file_path = IMAGES_PATH / filename
 
-    # Save the file
+    # Get image dimensions from the upload itself (PIL only parses the header)
+    width, height = None, None
+    if Image is not None:
+        try:
+            uploaded_file.seek(0)
+            with Image.open(uploaded_file) as img:
+                width, height = img.size
+        except (IOError, OSError):
+            pass  # Could not read image dimensions
+
+    # Save the file, copying in 1 MB chunks rather than one full-size buffer
+    uploaded_file.seek(0)
     with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-
-    # Get image dimensions
-    try:
-        from PIL import Image
-        img = Image.open(file_path)
-        width, height = img.size
-    except (IOError, OSError):
-        width, height = None, None  # Could not read image dimensions
+        shutil.copyfileobj(uploaded_file, f, length=1024 * 1024)
 
     return {
         'filename': filename,
         'original_filename': uploaded_file.name,
         'file_path': str(file_path),
-        'file_size': file_path.stat().st_size,
+        'file_size': uploaded_file.size,
         'width': width,
         'height': height
     }
@@ -50,264 +123,321 @@ def render():
     """Render the Notes page."""
     st.title("📝 Notes")
 
-    subjects = db.get_all_subjects()
+    version = db.data_version()
+    subjects = _cached_subjects(version)
     if not subjects:
         st.warning("Please add subjects first in the Subjects page.")
         st.stop()
 
+    # Selectboxes take subject ids and look names up here
+    subject_names = {s['id']: s['name'] for s in subjects}
+
     tab1, tab2, tab3, tab4 = st.tabs(["📚 All Notes", "➕ Add Note", "📷 Import (OCR)", "⭐ Favourites"])
 
     # TAB 1: All Notes
     with tab1:
-        notes = db.get_all_notes()
-
-        # Search
-        search_query = st.text_input("🔍 Search notes...", placeholder="Search by title or content")
-
-        if search_query:
-            notes = db.search_notes(search_query)
-            st.caption(f"Found {len(notes)} results")
-
-        # Filter
-        filter_subject = st.selectbox(
-            "Filter by subject:",
-            options=[None] + subjects,
-            format_func=lambda x: "All Subjects" if x is None else x['name'],
-            key="filter_notes"
-        )
-
-        if filter_subject and notes:
-            notes = [n for n in notes if n['subject_id'] == filter_subject['id']]
-
-        if notes:
-            col1, col2 = st.columns([1, 2])
-
-            with col1:
-                st.markdown("### Note List")
-                for i, note in enumerate(notes):
-                    fav_icon = "⭐" if note.get('is_favourite') else ""
-                    if st.button(f"{fav_icon} {note['title'][:30]}...", key=f"select_{note['id']}"):
-                        st.session_state.selected_note_id = note['id']
-
-            with col2:
-                if 'selected_note_id' in st.session_state:
-                    note = db.get_note_by_id(st.session_state.selected_note_id)
-                    if note:
-                        st.markdown(f"### {note['title']}")
-                        st.caption(f"{note['subject_name']} | {note.get('topic', 'No topic')}")
-                        st.markdown("---")
-                        st.markdown(note['content'])
-
-                        # Display associated images if any
-                        note_images = db.get_note_images(note['id'])
-                        if note_images:
-                            st.markdown("---")
-                            st.markdown("#### 📷 Source Images")
-                            img_cols = st.columns(min(len(note_images), 3))
-                            for i, img in enumerate(note_images):
-                                with img_cols[i % 3]:
-                                    if os.path.exists(img['file_path']):
-                                        st.image(img['file_path'], caption=img['original_filename'],
-                                                use_container_width=True)
-                                        st.caption(f"Size: {img['file_size'] // 1024}KB")
-                                    else:
-                                        st.warning(f"Image not found: {img['original_filename']}")
-
-                        st.markdown("---")
-
-                        action_col1, action_col2, action_col3 = st.columns(3)
-                        with action_col1:
-                            fav_text = "Remove ⭐" if note.get('is_favourite') else "Add ⭐"
-                            if st.button(fav_text):
-                                db.toggle_note_favourite(note['id'])
-                                st.rerun()
-                        with action_col2:
-                            if st.button("✏️ Edit"):
-                                st.session_state.editing_note = note
-                        with action_col3:
-                            if st.button("🗑️ Delete"):
-                                # Delete associated images from disk
-                                for img in note_images:
-                                    try:
-                                        if os.path.exists(img['file_path']):
-                                            os.remove(img['file_path'])
-                                    except OSError:
-                                        pass  # File deletion failed, continue anyway
-                                db.delete_note(note['id'])
-                                del st.session_state.selected_note_id
-                                st.rerun()
-                else:
-                    st.info("Select a note from the list to view it")
-        else:
-            st.info("No notes yet. Create some using the 'Add Note' tab!")
+        _notes_list_panel(subject_names)
 
     # TAB 2: Add Note
     with tab2:
         st.markdown("### Add New Note")
 
-        with st.form("add_note"):
-            title = st.text_input("Title *", placeholder="e.g., Cell Biology - Key Terms")
-            subject = st.selectbox(
-                "Subject *",
-                options=subjects,
-                format_func=lambda x: x['name']
-            )
-            topic = st.text_input("Topic (optional)", placeholder="e.g., Mitosis")
-            content = st.text_area("Content *", height=300, placeholder="Your notes here...")
-
-            if st.form_submit_button("Save Note", type="primary"):
-                if title and content:
-                    db.add_note(
-                        subject_id=subject['id'],
-                        title=title,
-                        content=content,
-                        topic=topic
-                    )
-                    st.success(f"Note saved: {title}")
-                    st.rerun()
-                else:
-                    st.error("Please fill in title and content")
+        if _add_note_form(subject_names, "add_note"):
+            st.rerun()
 
     # TAB 3: OCR Import
     with tab3:
-        st.markdown("### 📷 Import from Image (OCR)")
-        st.markdown("Upload a photo of handwritten or printed notes to convert to text.")
-
-        # Check Vision API availability
-        try:
-            import vision_ocr
-            vision_available = vision_ocr.is_vision_available()
-        except ImportError:
-            vision_available = False
-
-        if not vision_available:
-            st.error("Google Vision API is not configured. Please set up credentials.")
-            st.stop()
-
-        vision_ocr.show_api_cost_warning()
-
-        uploaded_file = st.file_uploader(
-            "Upload an image",
-            type=['png', 'jpg', 'jpeg'],
-            help="Supported formats: PNG, JPG, JPEG"
-        )
-
-        if uploaded_file:
-            st.image(uploaded_file, caption="Uploaded Image", use_container_width=True)
-
-            # Image quality assessment
-            try:
-                import ocr_utils
-                from PIL import Image
-
-                image = Image.open(uploaded_file)
-                quality_score, quality_msg = ocr_utils.assess_image_quality(image)
-
-                if quality_score >= 60:
-                    st.success(f"Image Quality: {quality_msg}")
-                elif quality_score >= 40:
-                    st.warning(f"Image Quality: {quality_msg}")
-                else:
-                    st.error(f"Image Quality: {quality_msg}")
-            except ImportError:
-                pass  # Quality assessment optional
-
-            if st.button("🔍 Extract Text", type="primary"):
-                with st.spinner("Processing image..."):
-                    try:
-                        uploaded_file.seek(0)
-                        image_bytes = uploaded_file.read()
-
-                        text, words, avg_confidence = vision_ocr.extract_text_with_confidence(image_bytes)
-
-                        if text and text.strip():
-                            st.success("Text extracted!")
-                            vision_ocr.display_confidence_result(text, words, avg_confidence)
-                            st.session_state.ocr_text = text
-                            st.session_state.ocr_uploaded_file = uploaded_file
-                        else:
-                            st.warning("No text could be extracted. Try a clearer image.")
-                    except Exception as e:
-                        st.error(f"OCR Error: {str(e)}")
-                        st.info("Check your Google Vision API credentials.")
-
-            if 'ocr_text' in st.session_state and st.session_state.ocr_text:
-                st.markdown("---")
-                st.markdown("### Save as Note")
-
-                with st.form("save_ocr"):
-                    ocr_title = st.text_input("Note Title *")
-                    ocr_subject = st.selectbox(
-                        "Subject *",
-                        options=subjects,
-                        format_func=lambda x: x['name'],
-                        key="ocr_subject"
-                    )
-                    ocr_topic = st.text_input("Topic (optional)")
-                    ocr_content = st.text_area("Content", value=st.session_state.ocr_text, height=200)
-                    save_image = st.checkbox("Save original image", value=True,
-                                            help="Store the source image alongside the extracted text")
-
-                    if st.form_submit_button("Save Note"):
-                        if ocr_title and ocr_content:
-                            # Save the note
-                            note_id = db.add_note(
-                                subject_id=ocr_subject['id'],
-                                title=ocr_title,
-                                content=ocr_content,
-                                topic=ocr_topic
-                            )
-
-                            # Save the image if requested and available
-                            if save_image and 'ocr_uploaded_file' in st.session_state:
-                                try:
-                                    # Reset file pointer
-                                    st.session_state.ocr_uploaded_file.seek(0)
-                                    image_info = save_uploaded_image(
-                                        st.session_state.ocr_uploaded_file,
-                                        note_id
-                                    )
-                                    # Save image record to database
-                                    image_id = db.add_note_image(
-                                        note_id=note_id,
-                                        filename=image_info['filename'],
-                                        original_filename=image_info['original_filename'],
-                                        file_path=image_info['file_path'],
-                                        file_size=image_info['file_size'],
-                                        width=image_info['width'],
-                                        height=image_info['height'],
-                                        extracted_text=ocr_content
-                                    )
-                                    # Index image for RAG search
-                                    try:
-                                        import rag
-                                        rag.index_note_image(image_id)
-                                    except Exception:
-                                        pass  # RAG indexing optional
-                                    st.success("Note and image saved!")
-                                except Exception as e:
-                                    st.warning(f"Note saved, but image storage failed: {e}")
-                            else:
-                                st.success("Note saved!")
-
-                            # Clean up session state
-                            if 'ocr_text' in st.session_state:
-                                del st.session_state.ocr_text
-                            if 'ocr_uploaded_file' in st.session_state:
-                                del st.session_state.ocr_uploaded_file
-                            st.rerun()
+        _ocr_panel(subject_names)
 
     # TAB 4: Favourites
     with tab4:
-        favourites = db.get_favourite_notes()
+        favourites = _cached_favourites(version)
         if favourites:
             st.markdown(f"### ⭐ Favourite Notes ({len(favourites)})")
             for note in favourites:
                 with st.expander(f"⭐ {note['title']}"):
                     st.caption(f"{note['subject_name']} | {note.get('topic', 'No topic')}")
-                    st.markdown(note['content'][:500] + "..." if len(note['content']) > 500 else note['content'])
+                    st.markdown(note['preview'] + "..." if note['content_length'] > 500 else note['preview'])
                     if st.button("View Full", key=f"view_fav_{note['id']}"):
                         st.session_state.selected_note_id = note['id']
                         st.rerun()
         else:
             st.info("No favourite notes yet. Star some notes to see them here!")
+
+
+def _add_note_form(subject_names: dict, form_key: str, content: str = "",
+                   image_option: bool = False):
+    """Title/subject/topic/content form shared by Add Note and OCR import.
+
+    Returns {'id', 'content', 'save_image'} for the note once it is saved,
+    otherwise None. image_option adds the "Save original image" checkbox.
+    """
+    with st.form(form_key):
+        title = st.text_input("Title *", placeholder="e.g., Cell Biology - Key Terms")
+        subject_id = st.selectbox(
+            "Subject *",
+            options=list(subject_names),
+            format_func=subject_names.get,
+            key=f"{form_key}_subject_id"
+        )
+        topic = st.text_input("Topic (optional)", placeholder="e.g., Mitosis")
+        content = st.text_area("Content *", value=content, height=300,
+                               placeholder="Your notes here...")
+        save_image = image_option and st.checkbox(
+            "Save original image", value=True,
+            help="Store the source image alongside the extracted text"
+        )
+
+        if st.form_submit_button("Save Note", type="primary"):
+            if title and content:
+                note_id = db.add_note(
+                    subject_id=subject_id,
+                    title=title,
+                    content=content,
+                    topic=topic
+                )
+                st.success(f"Note saved: {title}")
+                return {'id': note_id, 'content': content, 'save_image': save_image}
+            st.error("Please fill in title and content")
+
+    return None
+
+
+@st.fragment
+def _notes_list_panel(subject_names: dict):
+    """Searchable, paged note list with the selected note beside it.
+
+    Runs as a fragment, so typing a search, paging or picking a note reruns
+    only this tab. `version` is read here rather than passed in, because a
+    fragment rerun reuses the arguments from the last full run.
+    """
+    # Search
+    search_query = st.text_input("🔍 Search notes...", placeholder="Search by title or content")
+
+    # Filter
+    filter_col, page_col = st.columns([4, 1])
+    with filter_col:
+        subject_id = st.selectbox(
+            "Filter by subject:",
+            options=[None] + list(subject_names),
+            format_func=lambda x: "All Subjects" if x is None else subject_names[x],
+            key="filter_notes_id"
+        )
+
+    # Search, subject filter and paging are applied in SQL
+    version = db.data_version()
+    search = search_query or None
+    total = _cached_notes_count(version, subject_id=subject_id, search=search)
+    page_count = max(1, -(-total // NOTES_PER_PAGE))
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1,
+                               key="notes_page")
+
+    notes = _cached_notes(version, subject_id=subject_id, search=search, page=page)
+    if search_query:
+        st.caption(f"Found {total} results")
+    elif page_count > 1:
+        st.caption(f"{total} notes (page {page} of {page_count})")
+
+    if notes:
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown("### Note List")
+            # One selectable table instead of a button per note
+            notes_df = pd.DataFrame({
+                "fav": ["⭐" if note.get('is_favourite') else "" for note in notes],
+                "title": [note['title'] for note in notes],
+                "subject": [note['subject_name'] for note in notes],
+                "topic": [note.get('topic') or "" for note in notes]
+            })
+            table = st.dataframe(
+                notes_df,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    "fav": st.column_config.TextColumn("⭐", width="small"),
+                    "title": "Title",
+                    "subject": "Subject",
+                    "topic": "Topic"
+                },
+                on_select="rerun",
+                selection_mode="single-row",
+                key=f"notes_table_{subject_id}_{search_query}_{page}"
+            )
+
+            # Only act on a new pick, so "View Full" from Favourites isn't
+            # overridden by a row still selected here
+            selected_rows = table.selection.rows
+            if selected_rows:
+                picked_id = notes[selected_rows[0]]['id']
+                if st.session_state.get('notes_table_pick') != picked_id:
+                    st.session_state.notes_table_pick = picked_id
+                    st.session_state.selected_note_id = picked_id
+
+        with col2:
+            if 'selected_note_id' in st.session_state:
+                _note_detail_panel(st.session_state.selected_note_id)
+            else:
+                st.info("Select a note from the list to view it")
+    else:
+        st.info("No notes yet. Create some using the 'Add Note' tab!")
+
+
+def _note_detail_panel(note_id: int):
+    """Show one note with its images and actions.
+
+    Favouriting and deleting also change the Favourites tab, so those rerun
+    the whole page rather than just the note list fragment.
+    """
+    note = db.get_note_by_id(note_id)
+    if note:
+        st.markdown(f"### {note['title']}")
+        st.caption(f"{note['subject_name']} | {note.get('topic', 'No topic')}")
+        st.markdown("---")
+        st.markdown(note['content'])
+
+        # Display associated images if any
+        note_images = db.get_note_images(note['id'])
+        if note_images:
+            st.markdown("---")
+            st.markdown("#### 📷 Source Images")
+            img_cols = st.columns(min(len(note_images), 3))
+            for i, img in enumerate(note_images):
+                with img_cols[i % 3]:
+                    # Stat only this note's images, by their stored path
+                    if os.path.isfile(img['file_path']):
+                        st.image(img['file_path'], caption=img['original_filename'],
+                                use_container_width=True)
+                        st.caption(f"Size: {img['file_size'] // 1024}KB")
+                    else:
+                        st.warning(f"Image not found: {img['original_filename']}")
+
+        st.markdown("---")
+
+        action_col1, action_col2, action_col3 = st.columns(3)
+        with action_col1:
+            fav_text = "Remove ⭐" if note.get('is_favourite') else "Add ⭐"
+            if st.button(fav_text):
+                db.toggle_note_favourite(note['id'])
+                st.rerun()
+        with action_col2:
+            if st.button("✏️ Edit"):
+                st.session_state.editing_note = note
+        with action_col3:
+            if st.button("🗑️ Delete"):
+                # Delete associated images from disk
+                for img in note_images:
+                    try:
+                        Path(img['file_path']).unlink(missing_ok=True)
+                    except OSError:
+                        pass  # File deletion failed, continue anyway
+                db.delete_note(note['id'])
+                del st.session_state.selected_note_id
+                st.rerun()
+
+
+@st.fragment
+def _ocr_panel(subject_names: dict):
+    """Upload an image, extract its text and save it as a note.
+
+    Runs as a fragment so uploading and extracting text don't rerun the
+    other tabs; saving reruns the whole page so the new note is listed.
+    """
+    st.markdown("### 📷 Import from Image (OCR)")
+    st.markdown("Upload a photo of handwritten or printed notes to convert to text.")
+
+    # Check Vision API availability
+    if vision_ocr is None or not vision_ocr.is_vision_available():
+        st.error("Google Vision API is not configured. Please set up credentials.")
+        return
+
+    vision_ocr.show_api_cost_warning()
+
+    uploaded_file = st.file_uploader(
+        "Upload an image",
+        type=['png', 'jpg', 'jpeg'],
+        help="Supported formats: PNG, JPG, JPEG"
+    )
+
+    if uploaded_file:
+        st.image(uploaded_file, caption="Uploaded Image", use_container_width=True)
+
+        # Image quality assessment and cleanup are optional
+        preprocessing_available = ocr_utils is not None and Image is not None
+        if preprocessing_available:
+            image = Image.open(uploaded_file)
+            quality_score, quality_msg = ocr_utils.assess_image_quality(image)
+
+            if quality_score >= 60:
+                st.success(f"Image Quality: {quality_msg}")
+            elif quality_score >= 40:
+                st.warning(f"Image Quality: {quality_msg}")
+            else:
+                st.error(f"Image Quality: {quality_msg}")
+
+        clean_up = preprocessing_available and st.checkbox(
+            "Clean up image before extracting", value=False,
+            help="Convert to black and white text first. Can help very noisy "
+                 "scans, but may lose faint pencil, highlights or shadowed areas."
+        )
+
+        if st.button("🔍 Extract Text", type="primary"):
+            with st.spinner("Processing image..."):
+                try:
+                    text, words, avg_confidence = _extract_text_cached(uploaded_file, clean_up)
+
+                    if text and text.strip():
+                        st.success("Text extracted!")
+                        vision_ocr.display_confidence_result(text, words, avg_confidence)
+                        st.session_state.ocr_text = text
+                        st.session_state.ocr_uploaded_file = uploaded_file
+                    else:
+                        st.warning("No text could be extracted. Try a clearer image.")
+                except Exception as e:
+                    st.error(f"OCR Error: {str(e)}")
+                    st.info("Check your Google Vision API credentials.")
+
+        if 'ocr_text' in st.session_state and st.session_state.ocr_text:
+            st.markdown("---")
+            st.markdown("### Save as Note")
+
+            saved = _add_note_form(subject_names, "save_ocr",
+                                   content=st.session_state.ocr_text, image_option=True)
+            if saved:
+                # Save the image if requested and available
+                if saved['save_image'] and 'ocr_uploaded_file' in st.session_state:
+                    try:
+                        # Reset file pointer
+                        st.session_state.ocr_uploaded_file.seek(0)
+                        image_info = save_uploaded_image(
+                            st.session_state.ocr_uploaded_file,
+                            saved['id']
+                        )
+                        # Save image record to database
+                        image_id = db.add_note_image(
+                            note_id=saved['id'],
+                            filename=image_info['filename'],
+                            original_filename=image_info['original_filename'],
+                            file_path=image_info['file_path'],
+                            file_size=image_info['file_size'],
+                            width=image_info['width'],
+                            height=image_info['height'],
+                            extracted_text=saved['content']
+                        )
+                        # Index image for RAG search
+                        try:
+                            import rag
+                            rag.index_note_image(image_id)
+                        except Exception:
+                            pass  # RAG indexing optional
+                        st.success("Note and image saved!")
+                    except Exception as e:
+                        st.warning(f"Note saved, but image storage failed: {e}")
+
+                # Clean up session state
+                if 'ocr_text' in st.session_state:
+                    del st.session_state.ocr_text
+                if 'ocr_uploaded_file' in st.session_state:
+                    del st.session_state.ocr_uploaded_file
+                st.rerun()
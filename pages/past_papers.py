@@ -5,8 +5,21 @@ Upload, analyze, and track past paper performance with AI-powered insights.
 
 import streamlit as st
 import database as db
+import hashlib
 import json
-from io import BytesIO
+import pandas as pd
+from utils import call_claude_tool, call_claude_with_rag
+
+# Optional extraction dependencies, imported once rather than per upload
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    import vision_ocr
+except ImportError:
+    vision_ocr = None
 
 # Question types for categorization
 QUESTION_TYPES = [
@@ -31,16 +44,65 @@ QUESTION_TYPE_LABELS = {
     "other": "Other"
 }
 
+# Question type filter options, built once rather than on every rerun
+_TYPE_OPTIONS = [None] + QUESTION_TYPES
+
+QUESTIONS_PER_PAGE = 50
+
+
+# Cached reads: `version` is db.data_version(), so uploading, logging or
+# deleting a paper (or any other write) moves reruns onto a fresh cache entry.
+@st.cache_data(ttl=300, max_entries=32)
+def _cached_subjects(version):
+    return db.get_all_subjects()
+
+
+@st.cache_data(ttl=300, max_entries=32)
+def _cached_paper_count(version):
+    return db.get_paper_count()
+
+
+@st.cache_data(ttl=300, max_entries=32)
+def _cached_common_topics(version, subject_id, limit):
+    return db.get_common_topics(subject_id, limit=limit)
+
+
+@st.cache_data(ttl=300, max_entries=32)
+def _cached_question_type_stats(version, subject_id):
+    return db.get_question_type_stats(subject_id)
+
+
+@st.cache_data(ttl=300, max_entries=32)
+def _cached_questions(version, subject_id=None, topic=None, question_type=None, page=1):
+    return db.get_all_questions(subject_id=subject_id, topic=topic,
+                                question_type=question_type, limit=QUESTIONS_PER_PAGE,
+                                offset=(page - 1) * QUESTIONS_PER_PAGE)
+
+
+@st.cache_data(ttl=300, max_entries=32)
+def _cached_question_count(version, subject_id=None, topic=None, question_type=None):
+    return db.get_question_count(subject_id=subject_id, topic=topic,
+                                 question_type=question_type)
+
+
+@st.cache_data(ttl=300, max_entries=32)
+def _cached_papers(version, subject_id=None):
+    return db.get_all_past_papers(subject_id)
+
 
 def render():
     """Render the Past Papers page."""
     st.title("📄 Past Papers")
 
-    subjects = db.get_all_subjects()
+    version = db.data_version()
+    subjects = _cached_subjects(version)
     if not subjects:
         st.warning("Please add subjects first in the Subjects page.")
         st.stop()
 
+    # Selectboxes take subject ids and look names up here
+    subject_names = {s['id']: s['name'] for s in subjects}
+
     tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "📤 Upload Paper",
         "📊 Analysis",
@@ -51,35 +113,39 @@ def render():
 
     # TAB 1: Upload Paper
     with tab1:
-        _render_upload_tab(subjects)
+        _render_upload_tab(subject_names)
 
     # TAB 2: Analysis
     with tab2:
-        _render_analysis_tab(subjects)
+        _render_analysis_tab(subject_names)
 
     # TAB 3: Log Score (simple manual entry)
     with tab3:
-        _render_log_score_tab(subjects)
+        _render_log_score_tab(subject_names)
 
     # TAB 4: Question Bank
     with tab4:
-        _render_question_bank_tab(subjects)
+        _render_question_bank_tab(subject_names)
 
     # TAB 5: All Papers
     with tab5:
-        _render_all_papers_tab(subjects)
+        _render_all_papers_tab(subject_names)
 
 
-def _render_upload_tab(subjects):
-    """Render the upload and analysis tab."""
+@st.fragment
+def _render_upload_tab(subject_names):
+    """Render the upload and analysis tab.
+
+    Runs as a fragment; saving a paper reruns the whole page.
+    """
     st.markdown("### 📤 Upload & Analyze Past Paper")
     st.markdown("Upload a PDF or paste text from a past paper for AI analysis.")
 
-    subject = st.selectbox(
+    subject_id = st.selectbox(
         "Subject *",
-        options=subjects,
-        format_func=lambda x: x['name'],
-        key="upload_subject"
+        options=list(subject_names),
+        format_func=subject_names.get,
+        key="upload_subject_id"
     )
 
     col1, col2 = st.columns(2)
@@ -124,7 +190,10 @@ def _render_upload_tab(subjects):
             help="Upload a photo of the past paper"
         )
         if uploaded_image:
-            st.image(uploaded_image, caption="Uploaded Image", use_container_width=True)
+            # Only send the full-size photo back to the browser on request;
+            # every widget change on this tab reruns the page
+            if st.toggle("Show uploaded image", key="show_uploaded_paper_image"):
+                st.image(uploaded_image, caption="Uploaded Image", use_container_width=True)
             paper_content = _extract_image_text(uploaded_image)
             if paper_content:
                 with st.expander("Preview extracted text"):
@@ -135,7 +204,7 @@ def _render_upload_tab(subjects):
             with st.spinner("Analyzing paper with AI..."):
                 # Save paper first
                 paper_id = db.add_past_paper(
-                    subject_id=subject['id'],
+                    subject_id=subject_id,
                     paper_name=paper_name,
                     total_marks=total_marks,
                     exam_board=exam_board,
@@ -144,23 +213,23 @@ def _render_upload_tab(subjects):
                 )
 
                 # Analyze with AI
-                analysis = _analyze_paper_with_ai(paper_content, subject['name'])
+                analysis = _analyze_paper_with_ai(paper_content, subject_names[subject_id])
 
                 if analysis:
-                    # Save questions
-                    for q in analysis.get('questions', []):
-                        db.add_paper_question(
-                            paper_id=paper_id,
-                            question_number=q.get('number', '?'),
-                            question_text=q.get('text', ''),
-                            max_marks=q.get('marks', 1),
-                            topic=q.get('topic', ''),
-                            question_type=q.get('type', 'other'),
-                            difficulty=q.get('difficulty', 'medium')
-                        )
+                    # Save questions in one transaction
+                    db.add_paper_questions_bulk(paper_id, [{
+                        'question_number': q.get('number', '?'),
+                        'question_text': q.get('text', ''),
+                        'max_marks': q.get('marks', 1),
+                        'topic': q.get('topic', ''),
+                        'question_type': q.get('type', 'other'),
+                        'difficulty': q.get('difficulty', 'medium')
+                    } for q in analysis.get('questions', [])])
 
                     # Save summary
-                    db.update_paper_summary(paper_id, json.dumps(analysis.get('summary', {})))
+                    summary = analysis.get('summary', {})
+                    db.update_paper_summary(paper_id, json.dumps(summary),
+                                            key_topics=', '.join(summary.get('key_topics', [])[:5]))
 
                     st.success(f"Paper analyzed! Found {len(analysis.get('questions', []))} questions.")
 
@@ -172,51 +241,60 @@ def _render_upload_tab(subjects):
                 st.rerun()
 
 
-def _render_analysis_tab(subjects):
-    """Render the analysis and patterns tab."""
+@st.fragment
+def _render_analysis_tab(subject_names):
+    """Render the analysis and patterns tab (as a fragment)."""
     st.markdown("### 📊 Paper Analysis & Patterns")
 
-    paper_count = db.get_paper_count()
+    # Read here rather than passed in: fragment reruns reuse the arguments
+    # from the last full run
+    version = db.data_version()
+    paper_count = _cached_paper_count(version)
     if paper_count == 0:
         st.info("No papers analyzed yet. Upload some papers to see analysis!")
         return
 
     # Filter by subject
-    filter_subject = st.selectbox(
+    subject_id = st.selectbox(
         "Filter by subject:",
-        options=[None] + subjects,
-        format_func=lambda x: "All Subjects" if x is None else x['name'],
-        key="analysis_filter"
+        options=[None] + list(subject_names),
+        format_func=lambda x: "All Subjects" if x is None else subject_names[x],
+        key="analysis_filter_id"
     )
-    subject_id = filter_subject['id'] if filter_subject else None
+    common_topics = _cached_common_topics(version, subject_id, 10)
+    type_stats = _cached_question_type_stats(version, subject_id)
 
     # Overview metrics
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Papers Analyzed", paper_count)
     with col2:
-        common_topics = db.get_common_topics(subject_id, limit=5)
-        st.metric("Topics Identified", len(common_topics))
+        st.metric("Topics Identified", len(common_topics[:5]))
     with col3:
-        type_stats = db.get_question_type_stats(subject_id)
         st.metric("Question Types", len(type_stats))
 
     st.markdown("---")
 
     # Question Type Breakdown
     st.markdown("#### Question Type Distribution")
-    type_stats = db.get_question_type_stats(subject_id)
     if type_stats:
-        for stat in type_stats:
-            type_label = QUESTION_TYPE_LABELS.get(stat['question_type'], stat['question_type'])
-            col1, col2, col3 = st.columns([2, 1, 1])
-            with col1:
-                st.markdown(f"**{type_label}**")
-            with col2:
-                st.caption(f"{stat['count']} questions")
-            with col3:
-                if stat['avg_percentage']:
-                    st.caption(f"Avg: {stat['avg_percentage']:.0f}%")
+        st.dataframe(
+            pd.DataFrame({
+                "type": [QUESTION_TYPE_LABELS.get(t['question_type'], t['question_type'])
+                         for t in type_stats],
+                "count": [t['count'] for t in type_stats],
+                "avg_percentage": [t['avg_percentage'] for t in type_stats]
+            }),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "type": "Question Type",
+                "count": "Questions",
+                "avg_percentage": st.column_config.ProgressColumn(
+                    "Average", format="%.0f%%", min_value=0, max_value=100
+                )
+            }
+        )
     else:
         st.info("No question type data yet.")
 
@@ -224,20 +302,28 @@ def _render_analysis_tab(subjects):
 
     # Common Topics
     st.markdown("#### Most Common Topics")
-    common_topics = db.get_common_topics(subject_id, limit=10)
     if common_topics:
-        for topic in common_topics:
-            freq_bar = "█" * min(topic['frequency'], 10)
-            col1, col2, col3 = st.columns([2, 2, 1])
-            with col1:
-                st.markdown(f"**{topic['topic']}**")
-            with col2:
-                st.caption(f"{freq_bar} {topic['frequency']} times in {topic['paper_count']} papers")
-            with col3:
-                if topic['avg_percentage']:
-                    color = "#27ae60" if topic['avg_percentage'] >= 70 else "#e74c3c"
-                    st.markdown(f"<span style='color:{color}'>{topic['avg_percentage']:.0f}%</span>",
-                               unsafe_allow_html=True)
+        st.dataframe(
+            pd.DataFrame({
+                "topic": [t['topic'] for t in common_topics],
+                "frequency": [t['frequency'] for t in common_topics],
+                "paper_count": [t['paper_count'] for t in common_topics],
+                "avg_percentage": [t['avg_percentage'] for t in common_topics]
+            }),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "topic": "Topic",
+                "frequency": st.column_config.ProgressColumn(
+                    "Times Asked", format="%d", min_value=0,
+                    max_value=max(t['frequency'] for t in common_topics)
+                ),
+                "paper_count": "Papers",
+                "avg_percentage": st.column_config.ProgressColumn(
+                    "Average", format="%.0f%%", min_value=0, max_value=100
+                )
+            }
+        )
     else:
         st.info("No topic data yet.")
 
@@ -257,16 +343,20 @@ def _render_analysis_tab(subjects):
                 st.warning("Could not generate report. Try adding more papers.")
 
 
-def _render_log_score_tab(subjects):
-    """Render the simple score logging tab."""
+@st.fragment
+def _render_log_score_tab(subject_names):
+    """Render the simple score logging tab.
+
+    Runs as a fragment; saving a score reruns the whole page.
+    """
     st.markdown("### 📝 Log Paper Score")
     st.markdown("Quickly log your score on a past paper without uploading.")
 
     with st.form("add_paper"):
-        subject = st.selectbox(
+        subject_id = st.selectbox(
             "Subject *",
-            options=subjects,
-            format_func=lambda x: x['name']
+            options=list(subject_names),
+            format_func=subject_names.get
         )
         paper_name = st.text_input("Paper Name *", placeholder="e.g., June 2023 Paper 1")
 
@@ -284,7 +374,7 @@ def _render_log_score_tab(subjects):
         if st.form_submit_button("Save Paper", type="primary"):
             if paper_name and total_marks > 0:
                 paper_id = db.add_past_paper(
-                    subject_id=subject['id'],
+                    subject_id=subject_id,
                     paper_name=paper_name,
                     exam_board=exam_board,
                     year=year,
@@ -306,134 +396,172 @@ def _render_log_score_tab(subjects):
                 st.error("Please fill in required fields")
 
 
-def _render_question_bank_tab(subjects):
-    """Render the searchable question bank."""
+@st.fragment
+def _render_question_bank_tab(subject_names):
+    """Render the searchable question bank (as a fragment)."""
     st.markdown("### 🔍 Question Bank")
     st.markdown("Search and filter all questions from analyzed papers.")
 
-    col1, col2, col3 = st.columns(3)
+    version = db.data_version()
+
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
     with col1:
-        filter_subject = st.selectbox(
+        subject_id = st.selectbox(
             "Subject:",
-            options=[None] + subjects,
-            format_func=lambda x: "All" if x is None else x['name'],
-            key="qbank_subject"
+            options=[None] + list(subject_names),
+            format_func=lambda x: "All" if x is None else subject_names[x],
+            key="qbank_subject_id"
         )
     with col2:
         filter_type = st.selectbox(
             "Question Type:",
-            options=[None] + QUESTION_TYPES,
+            options=_TYPE_OPTIONS,
             format_func=lambda x: "All Types" if x is None else QUESTION_TYPE_LABELS.get(x, x),
             key="qbank_type"
         )
     with col3:
         filter_topic = st.text_input("Topic:", placeholder="Search topic...", key="qbank_topic")
 
-    subject_id = filter_subject['id'] if filter_subject else None
-    questions = db.get_all_questions(
-        subject_id=subject_id,
-        topic=filter_topic if filter_topic else None,
-        question_type=filter_type
-    )
+    # Filters and paging are applied in SQL
+    filters = dict(subject_id=subject_id, topic=filter_topic or None, question_type=filter_type)
+    total = _cached_question_count(version, **filters)
+    page_count = max(1, -(-total // QUESTIONS_PER_PAGE))
+    with col4:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1,
+                               key="qbank_page")
+
+    questions = _cached_questions(version, page=page, **filters)
 
     if questions:
-        st.caption(f"Found {len(questions)} questions")
+        if page_count > 1:
+            st.caption(f"Found {total} questions (page {page} of {page_count})")
+        else:
+            st.caption(f"Found {total} questions")
 
-        for q in questions[:50]:  # Limit display
-            type_label = QUESTION_TYPE_LABELS.get(q.get('question_type', ''), 'Unknown')
+        labels = QUESTION_TYPE_LABELS
+        for q in questions:
+            type_label = labels.get(q.get('question_type', ''), 'Unknown')
+            # One markdown block per question rather than one call per field
+            lines = [
+                f"**Paper:** {q['paper_name']} ({q.get('year', 'N/A')})",
+                f"**Subject:** {q['subject_name']}",
+                f"**Marks:** {q['max_marks']}"
+            ]
+            if q.get('question_text'):
+                lines.append(f"**Question:** {q['question_text'][:500]}...")
+            if q.get('difficulty'):
+                lines.append(f"**Difficulty:** {q['difficulty'].title()}")
             with st.expander(f"Q{q['question_number']} - {q.get('topic', 'No topic')} ({type_label})"):
-                st.markdown(f"**Paper:** {q['paper_name']} ({q.get('year', 'N/A')})")
-                st.markdown(f"**Subject:** {q['subject_name']}")
-                st.markdown(f"**Marks:** {q['max_marks']}")
-                if q.get('question_text'):
-                    st.markdown(f"**Question:** {q['question_text'][:500]}...")
-                if q.get('difficulty'):
-                    st.markdown(f"**Difficulty:** {q['difficulty'].title()}")
+                st.markdown("\n\n".join(lines))
     else:
         st.info("No questions found. Upload and analyze some papers first!")
 
 
-def _render_all_papers_tab(subjects):
-    """Render the all papers list."""
-    st.markdown("### 📚 All Papers")
+@st.fragment
+def _render_all_papers_tab(subject_names):
+    """Render the all papers list.
 
-    papers = db.get_all_past_papers()
+    Runs as a fragment, so filtering and selecting rows rerun only this tab;
+    deleting reruns the page because the Analysis tab's counts change too.
+    """
+    st.markdown("### 📚 All Papers")
 
-    if papers:
-        filter_subject = st.selectbox(
+    version = db.data_version()
+    if _cached_paper_count(version):
+        subject_id = st.selectbox(
             "Filter by subject:",
-            options=[None] + subjects,
-            format_func=lambda x: "All Subjects" if x is None else x['name'],
-            key="filter_papers"
+            options=[None] + list(subject_names),
+            format_func=lambda x: "All Subjects" if x is None else subject_names[x],
+            key="filter_papers_id"
+        )
+        papers = _cached_papers(version, subject_id)
+
+        if not papers:
+            st.info("No papers logged for this subject yet.")
+            return
+
+        # Score and percentage come from SQL; bands are cut column-wise, shown
+        # in one table instead of an expander and delete button per paper
+        papers_df = pd.DataFrame(papers)
+        papers_df['band'] = pd.cut(papers_df['percentage'], [float("-inf"), 60, 80, float("inf")],
+                                   right=False, labels=["🔴", "🟡", "🟢"])
+        papers_df['key_topics'] = papers_df['key_topics'].fillna("")
+
+        table = st.dataframe(
+            papers_df[["band", "paper_name", "subject_name", "exam_board", "year",
+                       "score", "percentage", "key_topics", "notes"]],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "band": st.column_config.TextColumn("", width="small"),
+                "paper_name": "Paper",
+                "subject_name": "Subject",
+                "exam_board": "Board",
+                "year": "Year",
+                "score": "Score",
+                "percentage": st.column_config.ProgressColumn(
+                    "%", format="%.0f%%", min_value=0, max_value=100
+                ),
+                "key_topics": "Key Topics",
+                "notes": "Notes"
+            },
+            on_select="rerun",
+            selection_mode="multi-row",
+            key=f"all_papers_table_{subject_id}"
         )
 
-        filtered = papers
-        if filter_subject:
-            filtered = [p for p in filtered if p['subject_id'] == filter_subject['id']]
-
-        for paper in filtered:
-            marks_achieved = paper.get('marks_achieved') or 0
-            total_marks = paper.get('total_marks') or 1
-            percentage = (marks_achieved / total_marks) * 100 if total_marks > 0 else 0
-
-            # Color based on score
-            if percentage >= 80:
-                color = "#27ae60"
-            elif percentage >= 60:
-                color = "#f39c12"
-            else:
-                color = "#e74c3c"
-
-            with st.expander(f"{paper['paper_name']} - {percentage:.0f}%"):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.markdown(f"**Subject:** {paper['subject_name']}")
-                    st.markdown(f"**Board:** {paper.get('exam_board', 'N/A')}")
-                with col2:
-                    st.markdown(f"**Score:** {marks_achieved}/{total_marks}")
-                    st.markdown(f"**Year:** {paper.get('year', 'N/A')}")
-                with col3:
-                    st.markdown(f"""
-                    <div style="background: {color}; color: white; padding: 20px; border-radius: 8px; text-align: center;">
-                        <h2 style="margin: 0; color: white;">{percentage:.0f}%</h2>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                # Show AI summary if available
-                if paper.get('ai_summary'):
-                    try:
-                        summary = json.loads(paper['ai_summary'])
-                        if summary.get('key_topics'):
-                            st.markdown(f"**Key Topics:** {', '.join(summary['key_topics'][:5])}")
-                    except json.JSONDecodeError:
-                        pass  # Invalid JSON in stored summary
-
-                if paper.get('notes'):
-                    st.markdown(f"**Notes:** {paper['notes']}")
-
-                if st.button("🗑️ Delete", key=f"del_paper_{paper['id']}"):
-                    db.delete_past_paper(paper['id'])
-                    st.rerun()
+        selected_rows = table.selection.rows
+        if st.button(f"🗑️ Delete Selected ({len(selected_rows)})",
+                     disabled=not selected_rows, key="del_selected_papers"):
+            for i in selected_rows:
+                db.delete_past_paper(papers[i]['id'])
+            st.rerun()
     else:
         st.info("No past papers logged yet. Add some using the 'Upload Paper' or 'Log Score' tabs!")
 
 
+# Extraction results are cached per file: every widget change on the Upload
+# tab reruns the page, and image OCR is a paid API call. The key is a hash
+# of the upload; the leading underscore keeps Streamlit from hashing (and
+# copying) the file object itself.
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
+def _pdf_text(file_hash: str, _pdf_file) -> str:
+    # pdfium reads pages from the file object as needed, without a bytes copy
+    _pdf_file.seek(0)
+    text_parts = []
+    pdf = pdfium.PdfDocument(_pdf_file)
+    try:
+        for page in pdf:
+            # pdfium ends lines with \r\n
+            text = page.get_textpage().get_text_range().replace("\r\n", "\n")
+            if text.strip():
+                text_parts.append(text)
+    finally:
+        pdf.close()
+
+    return "\n\n".join(text_parts)
+
+
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
+def _ocr_text(file_hash: str, _image_file) -> str:
+    text = vision_ocr.extract_text_from_bytes(_image_file.getvalue())
+    if text is None:
+        raise RuntimeError("Vision API returned no result")  # not cached; retried next run
+    return text
+
+
+def _upload_hash(uploaded_file) -> str:
+    """SHA-256 of an upload, read through its buffer without copying it."""
+    return hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+
+
 def _extract_pdf_text(uploaded_file) -> str:
     """Extract text from a PDF file."""
-    try:
-        import pdfplumber
-
-        text_parts = []
-        with pdfplumber.open(BytesIO(uploaded_file.read())) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
-
-        return "\n\n".join(text_parts)
-    except ImportError:
-        st.error("PDF library not installed. Run: pip install pdfplumber")
+    if pdfium is None:
+        st.error("PDF library not installed. Run: pip install pypdfium2")
         return None
+    try:
+        return _pdf_text(_upload_hash(uploaded_file), uploaded_file)
     except Exception as e:
         st.error(f"Error extracting PDF: {e}")
         return None
@@ -441,27 +569,71 @@ def _extract_pdf_text(uploaded_file) -> str:
 
 def _extract_image_text(uploaded_file) -> str:
     """Extract text from an image using Vision API."""
+    if vision_ocr is None or not vision_ocr.is_vision_available():
+        st.error("Google Vision API not configured")
+        return None
     try:
-        import vision_ocr
-
-        if not vision_ocr.is_vision_available():
-            st.error("Google Vision API not configured")
-            return None
-
-        uploaded_file.seek(0)
-        image_bytes = uploaded_file.read()
-        text = vision_ocr.extract_text_from_bytes(image_bytes)
-        return text
+        return _ocr_text(_upload_hash(uploaded_file), uploaded_file)
     except Exception as e:
         st.error(f"OCR error: {e}")
         return None
 
 
+# Structured output for paper analysis: Claude fills in this schema via a
+# forced tool call instead of writing JSON into its reply.
+_PAPER_ANALYSIS_TOOL = {
+    "name": "record_paper_analysis",
+    "description": "Record the questions extracted from an exam paper and a summary of it.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "questions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "number": {"type": "string", "description": "Question number, e.g. 1a"},
+                        "text": {"type": "string", "description": "Brief summary of the question"},
+                        "marks": {"type": "integer"},
+                        "topic": {"type": "string"},
+                        "type": {"type": "string", "enum": QUESTION_TYPES},
+                        "difficulty": {"type": "string", "enum": ["easy", "medium", "hard"]}
+                    },
+                    "required": ["number", "marks", "topic", "type", "difficulty"]
+                }
+            },
+            "summary": {
+                "type": "object",
+                "properties": {
+                    "key_topics": {"type": "array", "items": {"type": "string"}},
+                    "total_questions": {"type": "integer"},
+                    "patterns": {"type": "string"}
+                },
+                "required": ["key_topics", "total_questions", "patterns"]
+            }
+        },
+        "required": ["questions", "summary"]
+    }
+}
+
+
+ANALYSIS_MAX_CHARS = 8000
+
+
+def _truncate_for_llm(text: str, max_chars: int = ANALYSIS_MAX_CHARS) -> str:
+    """Cut text to max_chars, backing up to the last whitespace so no word is split."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    if text[max_chars].isspace():
+        return cut
+    head = cut.rsplit(None, 1)[0]
+    return head if head else cut
+
+
 def _analyze_paper_with_ai(content: str, subject_name: str) -> dict:
     """Use Claude to analyze paper content and extract questions."""
     try:
-        from utils import call_claude_with_rag
-
         prompt = f"""Analyze this {subject_name} past exam paper and extract all questions.
 
 For each question, identify:
@@ -469,58 +641,36 @@ For each question, identify:
 2. The question text (brief summary)
 3. Marks available
 4. Topic/theme it covers
-5. Question type (one of: multiple_choice, short_answer, essay, calculation, diagram, data_analysis, practical, other)
-6. Difficulty (easy, medium, hard)
+5. Question type
+6. Difficulty
 
 Also provide a summary with:
 - Key topics covered
-- Question type distribution
+- Total number of questions
 - Any patterns noticed
 
 Paper content:
-{content[:8000]}
-
-Respond in JSON format:
-{{
-    "questions": [
-        {{"number": "1a", "text": "...", "marks": 3, "topic": "...", "type": "...", "difficulty": "..."}}
-    ],
-    "summary": {{
-        "key_topics": ["topic1", "topic2"],
-        "total_questions": 10,
-        "patterns": "..."
-    }}
-}}"""
-
-        result, _ = call_claude_with_rag(prompt, system="You are an exam paper analyst. Extract question information accurately. Always respond with valid JSON.")
-
-        # Parse JSON from response
-        try:
-            # Find JSON in response
-            start = result.find('{')
-            end = result.rfind('}') + 1
-            if start >= 0 and end > start:
-                return json.loads(result[start:end])
-        except json.JSONDecodeError:
-            pass  # Invalid JSON from AI response
+{_truncate_for_llm(content)}"""
 
-        return None
+        return call_claude_tool(
+            st.session_state.get('bubble_ace_api_key', ''),
+            prompt,
+            _PAPER_ANALYSIS_TOOL,
+            system="You are an exam paper analyst. Extract question information accurately."
+        )
     except Exception as e:
         st.error(f"AI analysis error: {e}")
         return None
 
 
-def _generate_pattern_report(subject_id: int = None) -> str:
-    """Generate a pattern analysis report using AI."""
-    try:
-        from utils import call_claude_with_rag
-
-        # Gather data
-        common_topics = db.get_common_topics(subject_id, limit=15)
-        type_stats = db.get_question_type_stats(subject_id)
-        weak_topics = db.get_weak_topics(limit=10)
+@st.cache_data(ttl=300, max_entries=32)
+def _pattern_report_data(version, subject_id):
+    """Pattern report input data as prompt text, rebuilt only after a write."""
+    common_topics = db.get_common_topics(subject_id, limit=15)
+    type_stats = db.get_question_type_stats(subject_id)
+    weak_topics = db.get_weak_topics(limit=10)
 
-        data_summary = f"""
+    return f"""
 Topics frequency: {json.dumps([{'topic': t['topic'], 'freq': t['frequency'], 'papers': t['paper_count']} for t in common_topics])}
 
 Question types: {json.dumps([{'type': t['question_type'], 'count': t['count']} for t in type_stats])}
@@ -528,6 +678,12 @@ Question types: {json.dumps([{'type': t['question_type'], 'count': t['count']} f
 Weak areas: {json.dumps([{'topic': t['topic'], 'score': t['percentage']} for t in weak_topics])}
 """
 
+
+def _generate_pattern_report(subject_id: int = None) -> str:
+    """Generate a pattern analysis report using AI."""
+    try:
+        data_summary = _pattern_report_data(db.data_version(), subject_id)
+
         prompt = f"""Based on this past paper analysis data, write a helpful study report for a GCSE student.
 
 {data_summary}
@@ -541,10 +697,14 @@ Include:
 
 Make it actionable and encouraging. Use bullet points for clarity."""
 
-        result, _ = call_claude_with_rag(prompt, system="You are a helpful study advisor analyzing exam patterns.")
+        result, _ = call_claude_with_rag(
+            st.session_state.get('bubble_ace_api_key', ''),
+            prompt,
+            system="You are a helpful study advisor analyzing exam patterns."
+        )
         return result if not result.startswith("Error:") else None
 
-    except Exception as e:
+    except Exception:
         return None
 
 
@@ -5,6 +5,37 @@ Application settings and configuration.
 
 import streamlit as st
 import database as db
+import os
+
+
+# `version` is db.data_version(), so the counts refresh after any write
+@st.cache_data(ttl=30, max_entries=32)
+def _cached_data_counts(version: int) -> dict:
+    return db.get_data_counts()
+
+
+def _backups_signature() -> tuple:
+    """Name, size and mtime of each local backup zip.
+
+    A cheap directory scan that changes whenever a backup is created,
+    deleted or cleaned up, including by the scheduled backup job.
+    """
+    import backup
+
+    backup.ensure_backup_dir()
+    with os.scandir(backup.BACKUPS_PATH) as entries:
+        return tuple(sorted(
+            (e.name, e.stat().st_size, e.stat().st_mtime_ns)
+            for e in entries if e.name.endswith('.zip')
+        ))
+
+
+# Listing opens every backup zip to read its metadata; `signature` is
+# _backups_signature(), so the list is only rebuilt when the files change
+@st.cache_data(ttl=300, max_entries=8)
+def _cached_local_backups(signature: tuple) -> list:
+    import backup
+    return backup.list_local_backups()
 
 
 def render():
@@ -131,25 +162,16 @@ def render():
 
         col1, col2 = st.columns(2)
 
+        counts = _cached_data_counts(db.data_version())
         with col1:
-            subjects = db.get_all_subjects()
-            st.metric("Subjects", len(subjects))
-
-            all_homework = db.get_all_homework(include_completed=True)
-            st.metric("Homework Items", len(all_homework) if all_homework else 0)
-
-            notes_count = db.get_notes_count()
-            st.metric("Notes", notes_count)
+            st.metric("Subjects", counts['subjects'])
+            st.metric("Homework Items", counts['homework'])
+            st.metric("Notes", counts['notes'])
 
         with col2:
-            fc_stats = db.get_flashcard_stats()
-            st.metric("Flashcards", fc_stats['total'])
-
-            paper_count = db.get_paper_count()
-            st.metric("Past Papers", paper_count)
-
-            exams = db.get_all_exams()
-            st.metric("Exams", len(exams) if exams else 0)
+            st.metric("Flashcards", counts['flashcards'])
+            st.metric("Past Papers", counts['past_papers'])
+            st.metric("Exams", counts['exams'])
 
         st.markdown("---")
         st.markdown("#### Danger Zone")
@@ -258,7 +280,7 @@ def render():
                         st.error(msg)
 
         # List local backups
-        local_backups = backup.list_local_backups()
+        local_backups = _cached_local_backups(_backups_signature())
         if local_backups:
             st.markdown("##### Available Local Backups")
             for bkp in local_backups[:5]:  # Show last 5
@@ -324,45 +346,53 @@ def render():
     with tab6:
         st.markdown("### Search & Indexing")
 
-        try:
-            import rag
-            stats = rag.get_index_stats()
+        # rag imports sentence-transformers (and torch) at module load, so
+        # only pull it in once the user asks for the index status
+        if st.toggle("Show search index status", key="show_rag_status"):
+            _render_search_status()
 
-            st.markdown("#### Semantic Search Status")
 
-            semantic = stats.get('semantic_status', {})
-            if semantic.get('available'):
-                st.success("✅ Semantic search is available")
-                st.caption(f"Model: {semantic.get('model_name', 'Unknown')}")
-                st.caption(f"Model loaded: {'Yes' if semantic.get('model_loaded') else 'Not yet'}")
-            else:
-                st.warning("⚠️ Semantic search unavailable (keyword search only)")
-                if semantic.get('error'):
-                    st.caption(f"Error: {semantic['error']}")
-                st.info("Install sentence-transformers for semantic search: `pip install sentence-transformers`")
+def _render_search_status():
+    """Render semantic search availability, index stats and rebuild button."""
+    try:
+        import rag
+        stats = rag.get_index_stats()
 
-            st.markdown("#### Index Statistics")
+        st.markdown("#### Semantic Search Status")
 
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Indexed Documents", stats.get('total_documents', 0))
-                st.metric("Notes", stats.get('notes_count', 0))
-            with col2:
-                st.metric("Flashcards", stats.get('flashcards_count', 0))
-                st.metric("Note Images", stats.get('note_images_count', 0))
+        semantic = stats.get('semantic_status', {})
+        if semantic.get('available'):
+            st.success("✅ Semantic search is available")
+            st.caption(f"Model: {semantic.get('model_name', 'Unknown')}")
+            st.caption(f"Model loaded: {'Yes' if semantic.get('model_loaded') else 'Not yet'}")
+        else:
+            st.warning("⚠️ Semantic search unavailable (keyword search only)")
+            if semantic.get('error'):
+                st.caption(f"Error: {semantic['error']}")
+            st.info("Install sentence-transformers for semantic search: `pip install sentence-transformers`")
 
-            st.markdown("---")
+        st.markdown("#### Index Statistics")
 
-            if st.button("🔄 Rebuild Search Index", type="primary"):
-                with st.spinner("Rebuilding index... This may take a moment."):
-                    rag.index_all_content()
-                    st.success("Search index rebuilt!")
-                    st.rerun()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Indexed Documents", stats.get('total_documents', 0))
+            st.metric("Notes", stats.get('notes_count', 0))
+        with col2:
+            st.metric("Flashcards", stats.get('flashcards_count', 0))
+            st.metric("Note Images", stats.get('note_images_count', 0))
 
-        except ImportError:
-            st.error("RAG module not available")
-        except Exception as e:
-            st.error(f"Error loading search status: {e}")
+        st.markdown("---")
+
+        if st.button("🔄 Rebuild Search Index", type="primary"):
+            with st.spinner("Rebuilding index... This may take a moment."):
+                rag.index_all_content()
+                st.success("Search index rebuilt!")
+                st.rerun()
+
+    except ImportError:
+        st.error("RAG module not available")
+    except Exception as e:
+        st.error(f"Error loading search status: {e}")
 
 
 def _render_google_drive_section():
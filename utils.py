@@ -3,22 +3,39 @@ Study Assistant - Utility Functions
 Common helper functions used across the application.
 """
 
+import json
 from datetime import date
+from functools import lru_cache
 
+_json_decoder = json.JSONDecoder()
 
-def days_until(target_date) -> int:
-    """Calculate days until a target date."""
+
+@lru_cache(maxsize=4096)
+def days_between(date_str: str, today_ordinal: int) -> int:
+    """Days from `today_ordinal` (a date.toordinal()) to an ISO date string.
+
+    Memoised, so the same dates on the same day are only parsed once.
+    """
+    return date.fromisoformat(date_str).toordinal() - today_ordinal
+
+
+def days_until(target_date, today: date = None) -> int:
+    """Calculate days until a target date.
+
+    Pass `today` when annotating many rows so it is only looked up once.
+    """
+    today = today or date.today()
     if isinstance(target_date, str):
-        target_date = date.fromisoformat(target_date)
-    return (target_date - date.today()).days
+        return days_between(target_date, today.toordinal())
+    return (target_date - today).days
 
 
-def format_due_date(due_date) -> str:
+def format_due_date(due_date, today: date = None) -> str:
     """Format a due date with helpful text."""
     if isinstance(due_date, str):
         due_date = date.fromisoformat(due_date)
 
-    days = days_until(due_date)
+    days = days_until(due_date, today)
 
     if days < 0:
         return f"**OVERDUE** ({abs(days)} days ago)"
@@ -88,6 +105,24 @@ def get_subject_colour(index: int) -> str:
     return colours[index % len(colours)]
 
 
+def extract_json(text: str, opener: str = '{'):
+    """Return the first JSON object (or array, with opener='[') found in text.
+
+    Tolerates markdown fences and prose around the JSON, which Claude
+    sometimes adds. Returns None if nothing decodes.
+    """
+    if not text:
+        return None
+    i = text.find(opener)
+    while i != -1:
+        try:
+            value, _ = _json_decoder.raw_decode(text, i)
+            return value
+        except json.JSONDecodeError:
+            i = text.find(opener, i + 1)
+    return None
+
+
 # Available Claude models
 CLAUDE_MODELS = {
     'haiku': {
@@ -107,7 +142,19 @@ CLAUDE_MODELS = {
 DEFAULT_MODEL = 'sonnet'
 
 
-def call_claude(api_key: str, prompt: str, system: str = None, model: str = None) -> str:
+@lru_cache(maxsize=4)
+def _client(api_key: str):
+    """Shared Anthropic client per API key.
+
+    The client keeps an HTTP connection pool, so reusing it saves a TCP/TLS
+    handshake on every call after the first.
+    """
+    from anthropic import Anthropic
+    return Anthropic(api_key=api_key)
+
+
+def call_claude(api_key: str, prompt: str, system: str = None, model: str = None,
+                cache_system: bool = False, max_tokens: int = 2048) -> str:
     """Call the Claude API with a prompt.
 
     Args:
@@ -115,10 +162,12 @@ def call_claude(api_key: str, prompt: str, system: str = None, model: str = None
         prompt: User message to send
         system: System prompt (optional)
         model: Model to use - 'haiku' or 'sonnet' (default: sonnet)
+        cache_system: Mark the system prompt for prompt caching. Use for
+            static instructions that are reused across many calls.
+        max_tokens: Maximum tokens in the response
     """
     try:
-        from anthropic import Anthropic
-        client = Anthropic(api_key=api_key)
+        client = _client(api_key)
 
         # Get model ID
         model_key = model or DEFAULT_MODEL
@@ -126,10 +175,18 @@ def call_claude(api_key: str, prompt: str, system: str = None, model: str = None
 
         messages = [{"role": "user", "content": prompt}]
 
+        system_prompt = system or "You are a helpful study assistant for GCSE students. Use British English spellings."
+        if cache_system:
+            system_prompt = [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }]
+
         response = client.messages.create(
             model=model_id,
-            max_tokens=2048,
-            system=system or "You are a helpful study assistant for GCSE students. Use British English spellings.",
+            max_tokens=max_tokens,
+            system=system_prompt,
             messages=messages
         )
         return response.content[0].text
@@ -137,6 +194,44 @@ def call_claude(api_key: str, prompt: str, system: str = None, model: str = None
         return f"Error: {str(e)}"
 
 
+def call_claude_tool(api_key: str, prompt: str, tool: dict, system: str = None,
+                     model: str = None, max_tokens: int = 4096) -> dict:
+    """Call Claude and force a reply through a single tool.
+
+    The tool's input_schema describes the structured output wanted; the
+    API returns it as an already-parsed dict, so there is no JSON to find
+    or decode in free text.
+
+    Args:
+        api_key: Anthropic API key
+        prompt: User message to send
+        tool: Tool definition with 'name', 'description' and 'input_schema'
+        system: System prompt (optional)
+        model: Model to use - 'haiku' or 'sonnet' (default: sonnet)
+        max_tokens: Maximum tokens in the response
+
+    Returns:
+        The tool input dict, or None if Claude did not call the tool.
+    """
+    client = _client(api_key)
+
+    model_key = model or DEFAULT_MODEL
+    model_id = CLAUDE_MODELS.get(model_key, CLAUDE_MODELS[DEFAULT_MODEL])['id']
+
+    response = client.messages.create(
+        model=model_id,
+        max_tokens=max_tokens,
+        system=system or "You are a helpful study assistant for GCSE students. Use British English spellings.",
+        messages=[{"role": "user", "content": prompt}],
+        tools=[tool],
+        tool_choice={"type": "tool", "name": tool['name']}
+    )
+    for block in response.content:
+        if block.type == "tool_use":
+            return block.input
+    return None
+
+
 def call_claude_with_rag(api_key: str, prompt: str, system: str = None,
                          model: str = None, subject_id: int = None,
                          use_rag: bool = True) -> tuple:
@@ -190,8 +285,7 @@ When answering:
 4. If the question isn't covered by their materials, answer from your general knowledge"""
 
     try:
-        from anthropic import Anthropic
-        client = Anthropic(api_key=api_key)
+        client = _client(api_key)
 
         model_key = model or DEFAULT_MODEL
         model_id = CLAUDE_MODELS.get(model_key, CLAUDE_MODELS[DEFAULT_MODEL])['id']
@@ -266,8 +360,7 @@ IMPORTANT: Relevant information from the student's study materials has been prov
 Use this information when answering, and mention when something comes from their notes."""
 
     try:
-        from anthropic import Anthropic
-        client = Anthropic(api_key=api_key)
+        client = _client(api_key)
 
         model_key = model or DEFAULT_MODEL
         model_id = CLAUDE_MODELS.get(model_key, CLAUDE_MODELS[DEFAULT_MODEL])['id']
@@ -34,6 +34,16 @@ def is_vision_available() -> bool:
     return 'GOOGLE_APPLICATION_CREDENTIALS' in os.environ
 
 
+@st.cache_resource
+def _vision_client(credentials_path: str):
+    """One Vision client per credentials file, kept for the app's lifetime.
+
+    Building a client loads credentials and opens a gRPC channel, so it is
+    reused across OCR calls instead of made per image.
+    """
+    return vision.ImageAnnotatorClient()
+
+
 def setup_vision_client():
     """Initialize Google Vision API client using secrets.toml."""
     if not VISION_AVAILABLE:
@@ -50,8 +60,7 @@ def setup_vision_client():
                 st.error(f"Credentials file not found: {credentials_path}")
                 return None
 
-        client = vision.ImageAnnotatorClient()
-        return client
+        return _vision_client(os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'))
     except Exception as e:
         st.error(f"Failed to initialize Vision API: {e}")
         return None